@@ -0,0 +1,65 @@
+import json
+import os
+import sqlite3
+
+from analysis.git_history import GitHistory
+from analysis.history_cache import CACHE_DIR, HistoryCache
+
+SCHEMA_VERSION = 1
+
+
+class BlameCache:
+    """
+    On-disk cache of the blame line counts per author of every file at HEAD.
+    An entry is reused only when the file has the same blob and was not touched since the HEAD it was computed at.
+    """
+
+    def __init__(self, repo_path: str):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.cache_path = os.path.join(CACHE_DIR, HistoryCache.get_cache_file_name(repo_path, "-blame"))
+        self._connection = sqlite3.connect(self.cache_path)
+        self.__init_schema()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def load(self, head_sha: str, history: GitHistory) -> dict[str, tuple[str, dict[str, int]]]:
+        """Entries (path -> blob, lines per author) still valid for head_sha"""
+        row = self._connection.execute("SELECT value FROM context WHERE key = 'head'").fetchone()
+        if row is None:
+            return {}
+        cached_head = row[0]
+
+        touched: set[str] = set()
+        if cached_head != head_sha:
+            # after a rewrite of the history the old attributions cannot be trusted anymore
+            if not history.is_ancestor(cached_head, head_sha):
+                return {}
+            touched = history.get_touched_paths(cached_head, head_sha)
+            if ".mailmap" in touched:
+                return {}  # every author name could be different
+
+        entries = {}
+        for path, blob, counts in self._connection.execute("SELECT path, blob, counts FROM blame"):
+            if path not in touched:
+                entries[path] = (blob, json.loads(counts))
+        return entries
+
+    def save(self, head_sha: str, entries: dict[str, tuple[str, dict[str, int]]]) -> None:
+        with self._connection:
+            self._connection.execute("DELETE FROM blame")
+            self._connection.executemany(
+                "INSERT INTO blame (path, blob, counts) VALUES (?, ?, ?)",
+                ((path, blob, json.dumps(counts)) for path, (blob, counts) in entries.items()),
+            )
+            self._connection.execute("INSERT OR REPLACE INTO context (key, value) VALUES ('head', ?)", (head_sha,))
+
+    def __init_schema(self) -> None:
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self._connection.execute("DROP TABLE IF EXISTS blame")
+            self._connection.execute("DROP TABLE IF EXISTS context")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS blame (path TEXT PRIMARY KEY, blob TEXT NOT NULL, counts TEXT NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS context (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._connection.commit()
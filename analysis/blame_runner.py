@@ -0,0 +1,64 @@
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from git import Repo
+
+from analysis.workers import Workers
+
+
+class BlameRunner:
+    """Runs `git blame` on many files at once, each worker only waits on its own git process"""
+
+    def __init__(self, repo: Repo, workers: int = 0, rev: str = "HEAD"):
+        self._repo = repo
+        self.rev = rev
+        self.workers = Workers.get_count(workers)
+
+    def run(self, rel_paths: list[str]) -> Iterator[tuple[str, dict[str, int] | None, Exception | None]]:
+        """Yields (file, lines per author, error) in the same order as rel_paths, whatever the scheduling"""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(self.__safe_count_lines_per_author, rel_paths)
+            for rel_path, (authors_count, error) in zip(rel_paths, results, strict=True):
+                yield rel_path, authors_count, error
+
+    def count_lines_per_author(self, rel_path: str) -> dict[str, int]:
+        """
+        Streams `git blame --incremental`: one entry per hunk, the commit header only the first time a commit shows up.
+        Lines are counted per hunk, the file content is never transferred.
+        """
+        process = self._repo.git.blame("--incremental", self.rev, "--", rel_path, as_process=True)
+
+        authors_per_commit: dict[bytes, str] = {}
+        lines_per_commit: defaultdict[bytes, int] = defaultdict(int)
+        completed = False
+        try:
+            sha = None
+            for line in process.stdout:
+                if sha is None:
+                    # hunk header: <sha> <source line> <result line> <lines in hunk>
+                    fields = line.split()
+                    sha = fields[0]
+                    lines_per_commit[sha] += int(fields[3])
+                elif line.startswith(b"author "):
+                    authors_per_commit[sha] = line[len(b"author ") :].decode("utf-8", errors="replace").strip()
+                elif line.startswith(b"filename "):
+                    sha = None  # last line of every entry
+            completed = True
+        finally:
+            if completed:
+                process.wait()
+            else:
+                process.proc.kill()
+                process.proc.wait()
+
+        authors_count: defaultdict[str, int] = defaultdict(int)
+        for sha, lines in lines_per_commit.items():
+            authors_count[authors_per_commit[sha]] += lines
+        return authors_count
+
+    def __safe_count_lines_per_author(self, rel_path: str) -> tuple[dict[str, int] | None, Exception | None]:
+        try:
+            return self.count_lines_per_author(rel_path), None
+        except Exception as e:
+            return None, e
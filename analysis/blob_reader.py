@@ -0,0 +1,36 @@
+from subprocess import PIPE
+
+from git import Repo
+
+
+class BlobReader:
+    """Reads objects from the object database through one persistent `git cat-file --batch` process"""
+
+    def __init__(self, repo: Repo):
+        self._process = repo.git.cat_file("--batch", istream=PIPE, as_process=True)
+
+    def __enter__(self) -> "BlobReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def read(self, sha: str) -> bytes:
+        self._process.stdin.write(f"{sha}\n".encode("ascii"))
+        self._process.stdin.flush()
+
+        # <sha> <type> <size>\n<content>\n, or <sha> missing\n
+        header = self._process.stdout.readline().split()
+        if len(header) != 3:
+            raise ValueError(f"Object {sha} not found")
+
+        size = int(header[2])
+        content = self._process.stdout.read(size)
+        self._process.stdout.read(1)
+        return content
+
+    def close(self) -> None:
+        if self._process.proc.poll() is not None:
+            return
+        self._process.stdin.close()
+        self._process.proc.wait()
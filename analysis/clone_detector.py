@@ -0,0 +1,248 @@
+import lizard
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from entities.clone_data import CloneData, CloneLocation
+
+# base of the polynomial k-gram hash, the arithmetic wraps modulo 2**64
+HASH_BASE = np.uint64(1099511628211)
+
+
+class CloneDetector:
+    """
+    Finds runs of identical tokens across source files, whatever functions lizard recognises in them.
+    Every k-gram of tokens gets a Karp-Rabin hash and winnowing keeps the smallest hash of each window, so a run of at
+    least min_tokens tokens leaves the same fingerprint in every copy. Every place of a shared fingerprint is paired with
+    its first place only, the pairs are grouped by file pair and offset and grown into runs, and the runs of the same
+    first copy make one clone class with all its locations. Comments and layout are ignored.
+    """
+
+    def __init__(self, min_tokens: int = 50):
+        self.min_tokens = max(min_tokens, 2)
+        self.kgram = self.min_tokens // 2
+        self.window = self.min_tokens - self.kgram + 1
+        self._token_ids: dict[str, int] = {}
+        self._files: list[str] = []
+        self._tokens: list[np.ndarray] = []
+        self._lines: list[np.ndarray] = []
+        self._fingerprints: list[np.ndarray] = []
+        self._positions: list[np.ndarray] = []
+
+    def add_file(self, file_path: str, code: str) -> None:
+        reader = lizard.get_reader_for(file_path)
+        if reader is None:
+            return
+
+        comments = reader(None)
+        tokens: list[int] = []
+        lines: list[int] = []
+        line = 1
+        for token in reader.generate_tokens(code):
+            if not token.isspace() and comments.get_comment_from_token(token) is None:
+                tokens.append(self._token_ids.setdefault(token, len(self._token_ids) + 1))
+                lines.append(line)
+            line += token.count("\n")
+        if len(tokens) < self.min_tokens:
+            return
+
+        token_array = np.array(tokens, dtype=np.uint64)
+        hashes = CloneDetector.get_kgram_hashes(token_array, self.kgram)
+        positions = CloneDetector.winnow(hashes, self.window)
+        self._files.append(file_path)
+        self._tokens.append(token_array)
+        self._lines.append(np.array(lines, dtype=np.int32))
+        self._fingerprints.append(hashes[positions])
+        self._positions.append(positions)
+
+    def find_clones(self) -> list[CloneData]:
+        """Every run of at least min_tokens tokens found in more than one place with all its locations, longest first"""
+        if not self._files:
+            return []
+
+        file_a, start_a, file_b, start_b = self.__get_shared_fingerprints()
+        if len(file_a) == 0:
+            return []
+
+        runs: list[tuple[int, int, int, int, int]] = []
+        for file_a, file_b, offset, start, end in zip(
+            *(values.tolist() for values in self.__merge_runs(file_a, start_a, file_b, start_b)), strict=True
+        ):
+            # runs come sorted by file pair, offset and start, one already grown over this one gives nothing new
+            if runs and runs[-1][:2] == (file_a, file_b) and runs[-1][4] == offset and end <= runs[-1][3]:
+                continue
+            runs += self.__grow_run(file_a, file_b, offset, start, end)
+        runs = CloneDetector.__merge_overlapping(runs)
+
+        # runs inside another one of the same files (shifted copies of repeated code) are dropped
+        # sorted by start, longest first, so only the kept run reaching furthest has to be checked
+        kept_runs = []
+        cover: tuple[int, int, int, int, int] | None = None
+        for run in sorted(runs, key=lambda run: (run[0], run[1], run[2], -run[3])):
+            file_a, file_b, start, end, offset = run
+            if cover is None or cover[:2] != (file_a, file_b) or end > cover[3]:
+                cover = run
+            elif cover[2] + cover[4] <= start + offset and end + offset <= cover[3] + cover[4]:
+                continue
+            kept_runs.append((file_a, start, end, file_b, start + offset))
+
+        clones = [self.__get_clone(class_runs) for class_runs in CloneDetector.__group_classes(kept_runs)]
+        clones.sort(key=lambda clone: (-clone.tokens, -len(clone.locations)))
+        return clones
+
+    @staticmethod
+    def get_kgram_hashes(tokens: np.ndarray, kgram: int) -> np.ndarray:
+        """Hash of every run of kgram tokens, the same value the rolling Karp-Rabin update gives"""
+        count = len(tokens) - kgram + 1
+        hashes = np.zeros(count, dtype=np.uint64)
+        for offset in range(kgram):
+            hashes = hashes * HASH_BASE + tokens[offset : offset + count]
+        return hashes
+
+    @staticmethod
+    def winnow(hashes: np.ndarray, window: int) -> np.ndarray:
+        """
+        Sorted positions of the smallest hash of every window, robust winnowing: on ties the position chosen for the
+        previous window is kept if it is still inside, otherwise the rightmost smallest one is chosen.
+        A run of equal hashes then gives one fingerprint per window instead of one per position.
+        """
+        if len(hashes) <= window:
+            return np.array([len(hashes) - 1 - int(hashes[::-1].argmin())], dtype=np.intp)
+        windows = sliding_window_view(hashes, window)
+        rightmost = np.arange(len(windows)) + window - 1 - windows[:, ::-1].argmin(axis=1)
+
+        # a choice only changes when a strictly smaller hash comes in or when it leaves the window
+        positions = []
+        chosen = int(rightmost[0])
+        while True:
+            positions.append(chosen)
+            smaller = np.flatnonzero(hashes[chosen + 1 : chosen + window] < hashes[chosen])
+            if len(smaller) > 0:
+                chosen += 1 + int(smaller[0])
+            elif chosen + 1 < len(windows):
+                chosen = int(rightmost[chosen + 1])
+            else:
+                break
+        return np.array(positions, dtype=np.intp)
+
+    def __get_shared_fingerprints(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # (file, position) of the first place and of every other place of each fingerprint found in more than one place
+        # pairing with the first place only keeps widely copied code linear in its number of copies
+        files = np.repeat(np.arange(len(self._files)), [len(positions) for positions in self._positions])
+        positions = np.concatenate(self._positions)
+        hashes = np.concatenate(self._fingerprints)
+
+        # stable, so every group of equal hashes stays ordered by file and position
+        order = np.argsort(hashes, kind="stable")
+        hashes, files, positions = hashes[order], files[order], positions[order]
+        group_starts = np.flatnonzero(np.r_[True, hashes[1:] != hashes[:-1]])
+        group_sizes = np.diff(np.r_[group_starts, len(hashes)])
+        first = np.repeat(group_starts, group_sizes)
+        other = np.flatnonzero(first != np.arange(len(hashes)))
+        first = first[other]
+        return files[first], positions[first], files[other], positions[other]
+
+    def __merge_runs(
+        self, file_a: np.ndarray, start_a: np.ndarray, file_b: np.ndarray, start_b: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # fingerprints of the same file pair and offset at most a window apart belong to the same run
+        offsets = start_b - start_a
+        order = np.lexsort((start_a, offsets, file_b, file_a))
+        file_a, file_b, offsets, start_a = file_a[order], file_b[order], offsets[order], start_a[order]
+
+        breaks = np.r_[
+            True,
+            (file_a[1:] != file_a[:-1])
+            | (file_b[1:] != file_b[:-1])
+            | (offsets[1:] != offsets[:-1])
+            | (start_a[1:] - start_a[:-1] > self.window),
+        ]
+        firsts = np.flatnonzero(breaks)
+        lasts = np.r_[firsts[1:] - 1, len(breaks) - 1]
+        return file_a[firsts], file_b[firsts], offsets[firsts], start_a[firsts], start_a[lasts] + self.kgram
+
+    def __grow_run(self, file_a: int, file_b: int, offset: int, start: int, end: int) -> list[tuple[int, int, int, int, int]]:
+        # the run is grown on both sides up to the first differing token, fingerprints only mark where it is
+        tokens_a = self._tokens[file_a]
+        tokens_b = self._tokens[file_b]
+        # inside one file a run longer than its offset is dropped anyway, growing further than that is wasted
+        limit = offset if file_a == file_b else len(tokens_a)
+        start -= CloneDetector.__count_equal(tokens_a[:start][::-1], tokens_b[: start + offset][::-1], self.window, limit)
+        end += CloneDetector.__count_equal(tokens_a[end:], tokens_b[end + offset :], self.window, limit)
+
+        # merged fingerprints can leave differing tokens between them, the run is split at every one
+        mismatches = np.flatnonzero(tokens_a[start:end] != tokens_b[start + offset : end + offset]) + start
+        runs = []
+        for run_start, run_end in zip(np.r_[start, mismatches + 1].tolist(), np.r_[mismatches, end].tolist(), strict=True):
+            if run_end - run_start < self.min_tokens:
+                continue
+            if file_a == file_b and offset < run_end - run_start:
+                continue  # a repeated pattern overlapping itself
+            runs.append((file_a, file_b, run_start, run_end, offset))
+        return runs
+
+    @staticmethod
+    def __count_equal(tokens_a: np.ndarray, tokens_b: np.ndarray, chunk: int, limit: int) -> int:
+        # length of the common prefix up to limit, compared in doubling chunks so a short match stays cheap
+        limit = min(len(tokens_a), len(tokens_b), limit)
+        matched = 0
+        while matched < limit:
+            size = min(chunk, limit - matched)
+            equal = tokens_a[matched : matched + size] == tokens_b[matched : matched + size]
+            if not equal.all():
+                return matched + int(equal.argmin())
+            matched += size
+            chunk *= 2
+        return matched
+
+    @staticmethod
+    def __merge_overlapping(runs: list[tuple[int, int, int, int, int]]) -> list[tuple[int, int, int, int, int]]:
+        # runs of the same file pair and offset that overlap or touch are the same copy, found from several fingerprints
+        merged: list[tuple[int, int, int, int, int]] = []
+        for file_a, file_b, start, end, offset in sorted(runs, key=lambda run: (run[0], run[1], run[4], run[2])):
+            if merged:
+                last_file_a, last_file_b, last_start, last_end, last_offset = merged[-1]
+                if (last_file_a, last_file_b, last_offset) == (file_a, file_b, offset) and start <= last_end:
+                    merged[-1] = (file_a, file_b, last_start, max(last_end, end), offset)
+                    continue
+            merged.append((file_a, file_b, start, end, offset))
+        return merged
+
+    @staticmethod
+    def __group_classes(runs: list[tuple[int, int, int, int, int]]) -> list[list[tuple[int, int, int, int, int]]]:
+        # runs overlapping in the same first copy are copies of the same code and make one clone class,
+        # unless their other copy overlaps a location the class already has (code repeated inside one file)
+        classes: list[list[tuple[int, int, int, int, int]]] = []
+        open_classes: list[tuple[list[tuple[int, int, int, int, int]], dict[int, list[tuple[int, int]]]]] = []
+        for run in sorted(runs):
+            file_a, start, end, file_b, start_b = run
+            end_b = start_b + end - start
+            # the first location of every class is its first copy, grown with every run it gets
+            open_classes = [
+                (class_runs, taken) for class_runs, taken in open_classes if class_runs[0][0] == file_a and start < taken[file_a][0][1]
+            ]
+            for class_runs, taken in open_classes:
+                if all(end_b <= taken_start or taken_end <= start_b for taken_start, taken_end in taken.get(file_b, [])):
+                    break
+            else:
+                class_runs, taken = [], {file_a: [(start, end)]}
+                classes.append(class_runs)
+                open_classes.append((class_runs, taken))
+            class_runs.append(run)
+            taken[file_a][0] = (taken[file_a][0][0], max(taken[file_a][0][1], end))
+            taken.setdefault(file_b, []).append((start_b, end_b))
+        return classes
+
+    def __get_clone(self, class_runs: list[tuple[int, int, int, int, int]]) -> CloneData:
+        file_a = class_runs[0][0]
+        start = class_runs[0][1]
+        end = max(run[2] for run in class_runs)
+        locations = [self.__get_location(file_a, start, end - start)]
+        locations += [
+            self.__get_location(file_b, start_b, run_end - run_start)
+            for _, run_start, run_end, file_b, start_b in sorted(class_runs, key=lambda run: run[3:])
+        ]
+        return CloneData(tokens=end - start, locations=locations)
+
+    def __get_location(self, file: int, start: int, tokens: int) -> CloneLocation:
+        lines = self._lines[file]
+        return CloneLocation(file=self._files[file], lines=f"{lines[start]}-{lines[start + tokens - 1]}", tokens=tokens)
@@ -0,0 +1,124 @@
+import os
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+
+from entities.author import Author
+from entities.commit_record import CommitRecord
+from entities.count_per_extension import CountPerExtension
+from entities.stats.author_stats import AuthorStats
+from entities.stats.commit_stats import CommitStats
+from entities.stats.file_stats import FileStats
+
+
+class CommitCollector(ABC):
+    """Receives every commit of the history walk and builds one report section out of it"""
+
+    @abstractmethod
+    def collect(self, commit: CommitRecord, author: Author) -> None:
+        pass
+
+    @abstractmethod
+    def get_result(self) -> list:
+        pass
+
+    @staticmethod
+    def get_extension_from_file(file_path: str) -> str:
+        _, ext = os.path.splitext(file_path)
+        return ext.lstrip(".").lower()
+
+
+class AuthorStatsCollector(CommitCollector):
+    def __init__(self, authors: list[Author], exclude_extensions: set[str]):
+        self.exclude_extensions = exclude_extensions
+        self.author_stats_map = {
+            author.main_username: AuthorStats(
+                author,
+                0,
+                CountPerExtension(),
+                CountPerExtension(),
+                CountPerExtension(),
+                CountPerExtension(),
+            )
+            for author in authors
+        }
+
+    def collect(self, commit: CommitRecord, author: Author) -> None:
+        a_stats = self.author_stats_map[author.main_username]
+        a_stats.commits += 1
+
+        for file_change in commit.files:
+            ext = self.get_extension_from_file(file_change.path).strip()
+
+            if ext in self.exclude_extensions or ext == "":
+                continue
+
+            a_stats.insertions.total += file_change.insertions
+            a_stats.insertions.per_extension[ext] += file_change.insertions
+
+            a_stats.deletions.total += file_change.deletions
+            a_stats.deletions.per_extension[ext] += file_change.deletions
+
+            a_stats.lines.total += file_change.lines
+            a_stats.lines.per_extension[ext] += file_change.lines
+
+            a_stats.files.total += 1
+            a_stats.files.per_extension[ext] += 1
+
+    def get_result(self) -> list[AuthorStats]:
+        # removing all users with no data from list
+        return [stats for stats in self.author_stats_map.values() if stats.has_stats()]
+
+
+class FileStatsCollector(CommitCollector):
+    def __init__(self):
+        self.file_stats_map: dict[str, FileStats] = {}
+
+    def collect(self, commit: CommitRecord, author: Author) -> None:
+        commit_datetime = commit.committed_datetime.replace(tzinfo=None)
+
+        for file_change in commit.files:
+            file_name = file_change.path
+            if file_name not in self.file_stats_map:
+                file_extension = self.get_extension_from_file(file_name) or "Other"
+                self.file_stats_map[file_name] = FileStats(file_name, 0, None, None, file_extension)
+
+            f_stats = self.file_stats_map[file_name]
+            f_stats.changes += 1
+            if f_stats.last_update is None or commit_datetime > f_stats.last_update:
+                f_stats.last_update = commit_datetime
+                f_stats.last_author = author
+
+    def get_result(self) -> list[FileStats]:
+        return [stat for stat in self.file_stats_map.values() if stat.changes > 0]
+
+
+class CommitStatsCollector(CommitCollector):
+    def __init__(self):
+        self.commits_stats: list[CommitStats] = []
+
+    def collect(self, commit: CommitRecord, author: Author) -> None:
+        self.commits_stats.append(CommitStats(commit.sha, author, len(commit.files), commit.committed_datetime))
+
+    def get_result(self) -> list[CommitStats]:
+        return self.commits_stats
+
+
+class CommitPipeline:
+    """Walks the history once and dispatches each commit to every registered collector"""
+
+    def __init__(self, collectors: list[CommitCollector], find_author: Callable[[str], Author]):
+        self.collectors = collectors
+        self.find_author = find_author
+
+    def run(self, commits: Iterable[CommitRecord]) -> int:
+        walked = 0
+        for commit in commits:
+            if not commit.author_email:
+                continue
+
+            author = self.find_author(commit.author_email)
+            for collector in self.collectors:
+                collector.collect(commit, author)
+            walked += 1
+
+        return walked
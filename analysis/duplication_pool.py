@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analysis.workers import Workers
+from entities.lizard_data import LizardData, LizardLocation
+
+# metrics and code of every function in a pair, sent once per worker when the pool starts
+_worker_functions: list[LizardData] = []
+
+
+class DuplicationPool:
+    """
+    Scores duplicate candidate pairs in a process pool, scores come back in pair order.
+    Workers get the functions once as a corpus, every task is only two arrays of indexes into it.
+    """
+
+    # fewer pairs are scored in the main process, they would not pay back the start of the workers
+    MIN_PAIRS = 2000
+
+    def __init__(self, workers: int = 0):
+        self.workers = Workers.get_count(workers)
+
+    def run(self, stats: list[LizardData], left: np.ndarray, right: np.ndarray, max_score: float) -> list[float]:
+        """Score of stats[left[k]] against stats[right[k]] for every k, inf if it cannot be within max_score"""
+        used = np.unique(np.concatenate([left, right]))
+        corpus = [
+            (stats[i].nloc, stats[i].ccn, stats[i].token, stats[i].param, stats[i].length, stats[i].code)
+            for i in used.tolist()
+        ]
+        left = np.searchsorted(used, left)
+        right = np.searchsorted(used, right)
+
+        chunk_size = max(1, len(left) // (self.workers * 4))
+        tasks = [
+            (left[start : start + chunk_size], right[start : start + chunk_size], max_score)
+            for start in range(0, len(left), chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(corpus,)) as executor:
+            return [score for scores in executor.map(_score_pairs, tasks) for score in scores]
+
+
+def _init_worker(corpus: list[tuple[int, int, int, int, int, str]]) -> None:
+    global _worker_functions
+    location = LizardLocation("", "", "")
+    _worker_functions = [
+        LizardData(nloc, ccn, token, param, length, location, code_loader=lambda code=code: code)
+        for nloc, ccn, token, param, length, code in corpus
+    ]
+
+
+def _score_pairs(task: tuple[np.ndarray, np.ndarray, float]) -> list[float]:
+    left, right, max_score = task
+    return [
+        _worker_functions[i].similarity_score(_worker_functions[j], max_score)
+        for i, j in zip(left.tolist(), right.tolist(), strict=True)
+    ]
@@ -0,0 +1,315 @@
+import os
+import tempfile
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import timedelta
+from typing import BinaryIO
+
+from git import Repo
+
+from analysis.history_cache import HistoryCache
+from entities.commit_record import CommitRecord, FileChange
+from entities.period_filter import PeriodFilter
+from entities.ref_record import RefCounts, RefRecord
+
+COMMIT_MARKER = b"\x01"
+HEADER_FIELDS = 4  # sha, author name, author email, committer date
+READ_CHUNK_SIZE = 1 << 16
+SYMLINK_MODE = b"120000"
+GITLINK_MODE = b"160000"  # submodule
+
+# widest UTC offset a commit can carry, the period is naive wall-clock time so git gets a wider window
+MAX_UTC_OFFSET = timedelta(hours=14)
+GIT_DATE_FORMAT = "%Y-%m-%d %H:%M:%S +0000"
+
+
+class GitHistory:
+    """Streams the commit history through single `git log -z` processes"""
+
+    # every commit starts with a marker so it can be told apart from the numstat records
+    LOG_FORMAT = "%x01%H%x00%an%x00%ae%x00%cI"
+    AUTHOR_FORMAT = "%aN%x00%aE%x00%ae"
+    REF_FORMAT = "%(refname:lstrip=2)%00%(objectname)%00%(committerdate:iso-strict)%00%(authoremail)"
+
+    def __init__(self, repo: Repo, cache: HistoryCache | None = None):
+        self._repo = repo
+        self._cache = cache
+        self.last_cache_misses = 0
+
+    def iter_commits(self, *rev_args: str) -> Iterator[CommitRecord]:
+        if self._cache is None:
+            yield from self.__iter_log(*rev_args)
+            return
+
+        # listing the commits is cheap, only the ones never seen before need a diff
+        shas = self._repo.git.log(*rev_args, "--format=%H").split()
+        missing = self._cache.get_missing(shas)
+        self.last_cache_misses = len(missing)
+        if missing:
+            with tempfile.TemporaryFile() as stdin:
+                stdin.write("\n".join(missing).encode("ascii"))
+                stdin.seek(0)
+                self._cache.put_all(self.__iter_log("--no-walk=unsorted", "--stdin", istream=stdin))
+
+        yield from self._cache.iter_records(shas)
+
+    def iter_author_identities(self, *rev_args: str) -> Iterator[tuple[str, str, str]]:
+        """Distinct (name, email, raw email) of the commit authors, name and email already resolved through .mailmap"""
+        tokens = self.__iter_git_tokens("log", *rev_args, "-z", f"--format={GitHistory.AUTHOR_FORMAT}")
+
+        seen: set[tuple[bytes, bytes, bytes]] = set()
+        # with -z every commit is NUL terminated, so the fields come in groups of three
+        for identity in zip(tokens, tokens, tokens, strict=False):
+            if identity in seen:
+                continue
+            seen.add(identity)
+            name, email, raw_email = (GitHistory.__decode(value) for value in identity)
+            yield name, email, raw_email
+
+    def iter_refs(self, *patterns: str) -> Iterator[RefRecord]:
+        tokens = self.__iter_git_tokens("for_each_ref", f"--format={GitHistory.REF_FORMAT}", *patterns, separator=b"\n")
+        for line in tokens:
+            fields = line.split(b"\0")
+            if len(fields) != 4:
+                continue
+            name, sha, date, email = (GitHistory.__decode(value) for value in fields)
+            if not date:
+                continue  # not pointing to a commit
+            yield RefRecord(name, sha, CommitRecord.parse_date(date), email.strip("<>"))
+
+    def get_default_branch(self) -> str | None:
+        try:
+            # refs/remotes/origin/HEAD -> refs/remotes/origin/<default>
+            return self._repo.git.symbolic_ref("-q", "--short", "refs/remotes/origin/HEAD")
+        except Exception:
+            pass
+        try:
+            return self._repo.active_branch.name
+        except Exception:
+            return None  # detached HEAD
+
+    def count_commits_per_tip(self, tips: list[str], base_tip: str | None = None) -> dict[str, RefCounts]:
+        """
+        Counts the commits reachable from every tip with a single topological walk of the graph.
+        When base_tip is given, ahead/behind against it come out of the same walk.
+        """
+        tip_bits = {sha: 1 << i for i, sha in enumerate(dict.fromkeys(tips))}
+        if base_tip is not None and base_tip not in tip_bits:
+            tip_bits[base_tip] = 1 << len(tip_bits)
+        if not tip_bits:
+            return {}
+
+        # every commit carries the set of tips reaching it, commits with the same set are only counted
+        reach: dict[bytes, int] = {sha.encode("ascii"): bit for sha, bit in tip_bits.items()}
+        commits_per_set: defaultdict[int, int] = defaultdict(int)
+
+        with tempfile.TemporaryFile() as stdin:
+            stdin.write("\n".join(tip_bits).encode("ascii"))
+            stdin.seek(0)
+            # --topo-order never shows a commit before its children, so its set is complete when reached
+            lines = self.__iter_git_tokens("rev_list", "--topo-order", "--parents", "--stdin", istream=stdin, separator=b"\n")
+            for line in lines:
+                sha, *parents = line.split()
+                tips_set = reach.pop(sha, 0)
+                commits_per_set[tips_set] += 1
+                for parent in parents:
+                    reach[parent] = reach.get(parent, 0) | tips_set
+
+        base_bit = tip_bits[base_tip] if base_tip is not None else 0
+        counts = dict.fromkeys(tip_bits.values(), 0)
+        shared_with_base = dict.fromkeys(tip_bits.values(), 0)
+        for tips_set, commits in commits_per_set.items():
+            remaining = tips_set
+            while remaining:
+                bit = remaining & -remaining
+                counts[bit] += commits
+                if tips_set & base_bit:
+                    shared_with_base[bit] += commits
+                remaining ^= bit
+
+        result = {}
+        for sha, bit in tip_bits.items():
+            if base_tip is None:
+                result[sha] = RefCounts(counts[bit])
+            else:
+                result[sha] = RefCounts(
+                    counts[bit],
+                    ahead=counts[bit] - shared_with_base[bit],
+                    behind=counts[base_bit] - shared_with_base[bit],
+                )
+        return result
+
+    def get_tree_blobs(self, rev: str = "HEAD", include_symlinks: bool = True) -> list[tuple[str, str]]:
+        """(path, blob sha) of every file in the tree of rev, submodules excluded"""
+        blobs = []
+        for entry in self.__iter_git_tokens("ls_tree", "-r", "-z", rev):
+            info, _, path = entry.partition(b"\t")
+            fields = info.split()
+            if len(fields) != 3 or fields[1] != b"blob":
+                continue
+            if not include_symlinks and fields[0] == SYMLINK_MODE:
+                continue
+            blobs.append((GitHistory.__decode(path), GitHistory.__decode(fields[2])))
+        return blobs
+
+    def get_tracked_paths(self) -> list[str]:
+        """Paths of the index, i.e. the files of the working tree git knows about"""
+        return list(dict.fromkeys(GitHistory.__decode(path) for path in self.__iter_git_tokens("ls_files", "-z") if path))
+
+    def get_working_tree_blobs(self) -> dict[str, str]:
+        """
+        Blob sha of every tracked file as git stores it, i.e. after the clean and eol filters (core.autocrlf...).
+        Files unchanged since the index come from the index, modified ones are hashed by git.
+        """
+        blobs = {}
+        for entry in self.__iter_git_tokens("ls_files", "-s", "-z"):
+            info, _, path = entry.partition(b"\t")
+            fields = info.split()  # mode, blob, stage
+            if len(fields) != 3 or fields[0] in (SYMLINK_MODE, GITLINK_MODE):
+                continue
+            blobs[GitHistory.__decode(path)] = GitHistory.__decode(fields[1])
+
+        modified = [
+            path
+            for path in (GitHistory.__decode(token) for token in self.__iter_git_tokens("ls_files", "-m", "-z") if token)
+            if os.path.isfile(os.path.join(self._repo.working_tree_dir, path))  # deleted files are listed too
+        ]
+        blobs.update(zip(modified, self.hash_paths(modified), strict=True))
+        return blobs
+
+    def hash_paths(self, paths: list[str]) -> list[str]:
+        """Blob sha git would store for every file, with the filters of its path"""
+        if not paths:
+            return []
+        with tempfile.TemporaryFile() as stdin:
+            stdin.write("\n".join(paths).encode("utf-8"))
+            stdin.seek(0)
+            lines = self.__iter_git_tokens("hash_object", "--stdin-paths", istream=stdin, separator=b"\n")
+            return [GitHistory.__decode(line) for line in lines if line]
+
+    def get_touched_paths(self, since: str, until: str) -> set[str]:
+        """Every path changed by at least one commit in since..until, even if changed back later"""
+        tokens = self.__iter_git_tokens("log", "-z", "--format=", "--name-only", "--no-renames", f"{since}..{until}")
+        return {GitHistory.__decode(token.strip(b"\n")) for token in tokens if token.strip(b"\n")}
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        try:
+            return self._repo.is_ancestor(ancestor, descendant)
+        except Exception:
+            return False  # e.g. the cached commit does not exist anymore
+
+    def __iter_log(self, *rev_args: str, istream: BinaryIO | None = None) -> Iterator[CommitRecord]:
+        tokens = self.__iter_git_tokens(
+            "log",
+            *rev_args,
+            "-z",
+            "--numstat",
+            "--no-renames",
+            "--diff-merges=first-parent",  # same numbers as GitPython's commit.stats, needs git 2.31
+            f"--format={GitHistory.LOG_FORMAT}",
+            istream=istream,
+        )
+        yield from GitHistory.parse_log_tokens(tokens)
+
+    def __iter_git_tokens(
+        self, command: str, *args: str, istream: BinaryIO | None = None, separator: bytes = b"\0"
+    ) -> Iterator[bytes]:
+        process = getattr(self._repo.git, command)(*args, istream=istream, as_process=True)
+
+        completed = False
+        try:
+            yield from GitHistory.__split_stream(process.stdout, separator)
+            completed = True
+        finally:
+            if completed:
+                process.wait()
+            else:
+                # the consumer stopped early, no need to let git walk the rest of the history
+                process.proc.kill()
+                process.proc.wait()
+
+    @staticmethod
+    def get_period_args(period: PeriodFilter) -> list[str]:
+        """Revision limiting arguments that select a superset of the commits inside the period"""
+        args = []
+        if period.start_date:
+            # --since stops the walk at older commits, so commits outside the window are never read
+            args.append(f"--since={(period.start_date - MAX_UTC_OFFSET).strftime(GIT_DATE_FORMAT)}")
+        if period.end_date:
+            args.append(f"--until={(period.end_date + MAX_UTC_OFFSET).strftime(GIT_DATE_FORMAT)}")
+        return args
+
+    @staticmethod
+    def parse_log_tokens(tokens: Iterable[bytes]) -> Iterator[CommitRecord]:
+        record: CommitRecord | None = None
+        header: list[bytes] = []
+
+        for token in tokens:
+            if token.startswith(COMMIT_MARKER):
+                if record is not None:
+                    yield record
+                record = None
+                header = [token[len(COMMIT_MARKER) :]]
+                continue
+
+            if record is None:
+                if not header:
+                    continue
+                header.append(token)
+                if len(header) == HEADER_FIELDS:
+                    record = GitHistory.__build_record(header)
+                continue
+
+            file_change = GitHistory.__parse_numstat(token)
+            if file_change is not None:
+                record.files.append(file_change)
+
+        if record is not None:
+            yield record
+
+    @staticmethod
+    def __split_stream(stream: BinaryIO, separator: bytes) -> Iterator[bytes]:
+        pending = b""
+        while chunk := stream.read(READ_CHUNK_SIZE):
+            pending += chunk
+            *tokens, pending = pending.split(separator)
+            yield from tokens
+        if pending:
+            yield pending
+
+    @staticmethod
+    def __build_record(header: list[bytes]) -> CommitRecord:
+        sha, name, email, date = (GitHistory.__decode(value) for value in header)
+        return CommitRecord(
+            sha=sha,
+            author_name=name,
+            author_email=email,
+            committed_datetime=CommitRecord.parse_date(date),
+        )
+
+    @staticmethod
+    def __parse_numstat(token: bytes) -> FileChange | None:
+        # the first numstat record of a commit is preceded by the format's newline
+        token = token.lstrip(b"\n")
+        if not token:
+            return None
+
+        parts = token.split(b"\t", 2)
+        if len(parts) != 3:
+            return None
+
+        insertions, deletions, path = parts
+        return FileChange(
+            path=GitHistory.__decode(path),
+            insertions=GitHistory.__to_int(insertions),
+            deletions=GitHistory.__to_int(deletions),
+        )
+
+    @staticmethod
+    def __to_int(value: bytes) -> int:
+        # binary files are reported as "-"
+        return int(value) if value.isdigit() else 0
+
+    @staticmethod
+    def __decode(value: bytes) -> str:
+        return value.decode("utf-8", errors="replace")
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import sqlite3
+from collections.abc import Iterable, Iterator
+
+from entities.commit_record import CommitRecord, FileChange
+
+CACHE_DIR = "./cache"
+SCHEMA_VERSION = 1
+QUERY_CHUNK_SIZE = 500  # stays below SQLite's limit of bound parameters per statement
+
+
+class HistoryCache:
+    """On-disk cache of the per-commit numstat, a commit never changes so entries never expire"""
+
+    def __init__(self, repo_path: str):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.cache_path = os.path.join(CACHE_DIR, HistoryCache.get_cache_file_name(repo_path))
+        self._connection = sqlite3.connect(self.cache_path)
+        self.__init_schema()
+
+    @staticmethod
+    def get_cache_file_name(repo_path: str, suffix: str = "") -> str:
+        abs_path = os.path.abspath(repo_path)
+        path_hash = hashlib.sha1(abs_path.encode("utf-8")).hexdigest()[:12]
+        return f"{os.path.basename(abs_path.rstrip(os.sep)) or 'repo'}-{path_hash}{suffix}.sqlite3"
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def get_missing(self, shas: list[str]) -> list[str]:
+        cached: set[str] = set()
+        for chunk in HistoryCache.__chunks(shas):
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._connection.execute(f"SELECT sha FROM commits WHERE sha IN ({placeholders})", chunk)
+            cached.update(row[0] for row in rows)
+        return [sha for sha in shas if sha not in cached]
+
+    def put_all(self, records: Iterable[CommitRecord]) -> int:
+        count = 0
+        with self._connection:
+            for record in records:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO commits (sha, author_name, author_email, committed_date, files) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        record.sha,
+                        record.author_name,
+                        record.author_email,
+                        record.committed_datetime.isoformat(),
+                        json.dumps([[f.path, f.insertions, f.deletions] for f in record.files]),
+                    ),
+                )
+                count += 1
+        return count
+
+    def iter_records(self, shas: list[str]) -> Iterator[CommitRecord]:
+        """Yields the cached records in the same order as the given sha list"""
+        for chunk in HistoryCache.__chunks(shas):
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._connection.execute(
+                f"SELECT sha, author_name, author_email, committed_date, files FROM commits WHERE sha IN ({placeholders})",
+                chunk,
+            )
+            records = {row[0]: HistoryCache.__row_to_record(row) for row in rows}
+            for sha in chunk:
+                if sha in records:
+                    yield records[sha]
+
+    def __init_schema(self) -> None:
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            # older layouts are simply rebuilt, everything in here can be recomputed from git
+            self._connection.execute("DROP TABLE IF EXISTS commits")
+        self._connection.execute(
+            """CREATE TABLE IF NOT EXISTS commits (
+                sha TEXT PRIMARY KEY,
+                author_name TEXT NOT NULL,
+                author_email TEXT NOT NULL,
+                committed_date TEXT NOT NULL,
+                files TEXT NOT NULL
+            )"""
+        )
+        self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._connection.commit()
+
+    @staticmethod
+    def __row_to_record(row: tuple) -> CommitRecord:
+        sha, author_name, author_email, committed_date, files = row
+        return CommitRecord(
+            sha=sha,
+            author_name=author_name,
+            author_email=author_email,
+            committed_datetime=CommitRecord.parse_date(committed_date),
+            files=[FileChange(path, insertions, deletions) for path, insertions, deletions in json.loads(files)],
+        )
+
+    @staticmethod
+    def __chunks(values: list[str]) -> Iterator[list[str]]:
+        for i in range(0, len(values), QUERY_CHUNK_SIZE):
+            yield values[i : i + QUERY_CHUNK_SIZE]
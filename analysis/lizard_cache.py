@@ -0,0 +1,138 @@
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from dataclasses import astuple
+
+import lizard
+
+from analysis.history_cache import CACHE_DIR, HistoryCache
+from entities.function_metrics import FunctionMetrics
+
+SCHEMA_VERSION = 1
+
+DEFAULT_MAX_FUNCTIONS = 200_000
+
+# parsed files written to disk at once, so a long history never holds all its results in memory
+FLUSH_EVERY = 1000
+
+
+class LizardMemory:
+    """
+    Lizard results of the most recently used files, bounded by the number of functions they hold.
+    The least recently used files are dropped first.
+    """
+
+    def __init__(self, max_functions: int = DEFAULT_MAX_FUNCTIONS):
+        self.max_functions = max_functions
+        self.total_functions = 0
+        self._files: OrderedDict[str, list[FunctionMetrics]] = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._files
+
+    def get(self, key: str) -> list[FunctionMetrics] | None:
+        functions = self._files.get(key)
+        if functions is not None:
+            self._files.move_to_end(key)
+        return functions
+
+    def put(self, key: str, functions: list[FunctionMetrics]) -> None:
+        previous = self._files.pop(key, None)
+        if previous is not None:
+            self.total_functions -= len(previous)
+        self._files[key] = functions
+        self.total_functions += len(functions)
+        # the file just added always stays, even when it has more functions than the limit on its own
+        while self.total_functions > self.max_functions and len(self._files) > 1:
+            _, evicted = self._files.popitem(last=False)
+            self.total_functions -= len(evicted)
+
+
+class LizardCache:
+    """
+    Lizard results per file content, in memory and on disk.
+    The key is the blob sha plus the lizard reader, so the same content is parsed once whatever the path or commit.
+    The memory keeps the most recently used files up to max_functions functions, the rest is read back from disk.
+    """
+
+    def __init__(self, repo_path: str, max_functions: int = DEFAULT_MAX_FUNCTIONS):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        self.cache_path = os.path.join(CACHE_DIR, HistoryCache.get_cache_file_name(repo_path, "-lizard"))
+        self._connection = sqlite3.connect(self.cache_path)
+        self._memory = LizardMemory(max_functions)
+        self._pending: dict[str, list[FunctionMetrics]] = {}
+        self._prefetched: set[str] = set()  # parsed ahead of their first use, e.g. by a LizardPool
+        self.hits = 0
+        self.parsed = 0
+        self.__init_schema()
+
+    @staticmethod
+    def get_key(blob: str, rel_path: str) -> str:
+        reader = lizard.get_reader_for(rel_path)
+        return f"{blob}:{reader.__name__ if reader else ''}"
+
+    def get(self, key: str) -> list[FunctionMetrics] | None:
+        functions = self.__load(key)
+        # the first use of a file parsed ahead in this run is not a reuse
+        if functions is not None and key not in self._prefetched:
+            self.hits += 1
+        self._prefetched.discard(key)
+        return functions
+
+    def contains(self, key: str) -> bool:
+        return self.__load(key) is not None
+
+    def put(self, key: str, functions: list[FunctionMetrics], prefetched: bool = False) -> None:
+        if prefetched:
+            self._prefetched.add(key)
+        self._memory.put(key, functions)
+        self._pending[key] = functions
+        self.parsed += 1
+        if len(self._pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO lizard (key, functions) VALUES (?, ?)",
+                (
+                    (key, json.dumps([astuple(function) for function in functions]))
+                    for key, functions in self._pending.items()
+                ),
+            )
+        self._pending = {}
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+    def __load(self, key: str) -> list[FunctionMetrics] | None:
+        functions = self._memory.get(key)
+        if functions is not None:
+            return functions
+
+        functions = self._pending.get(key)
+        if functions is None:
+            row = self._connection.execute("SELECT functions FROM lizard WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                functions = [FunctionMetrics(*values) for values in json.loads(row[0])]
+        if functions is not None:
+            self._memory.put(key, functions)
+        return functions
+
+    def __init_schema(self) -> None:
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        stored_lizard = None
+        if version == SCHEMA_VERSION:
+            stored_lizard = self._connection.execute("SELECT value FROM context WHERE key = 'lizard'").fetchone()
+
+        # another lizard version could count differently
+        if stored_lizard is None or stored_lizard[0] != lizard.version:
+            self._connection.execute("DROP TABLE IF EXISTS lizard")
+            self._connection.execute("DROP TABLE IF EXISTS context")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS lizard (key TEXT PRIMARY KEY, functions TEXT NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS context (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._connection.execute("INSERT OR REPLACE INTO context (key, value) VALUES ('lizard', ?)", (lizard.version,))
+        self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._connection.commit()
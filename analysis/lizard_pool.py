@@ -0,0 +1,66 @@
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+import lizard
+from git import Repo
+
+from analysis.blob_reader import BlobReader
+from analysis.snapshot_analyzer import SnapshotAnalyzer
+from analysis.workers import Workers
+from entities.function_metrics import FunctionMetrics
+
+# one reader per worker process, lizard parsing is CPU bound so threads would not help
+_worker_repo_path = ""
+_worker_reader: BlobReader | None = None
+_worker_analyzer: lizard.FileAnalyzer | None = None
+
+
+class LizardPool:
+    """
+    Parses many files with lizard in a process pool, results come back in input order.
+    Blobs are read by a `git cat-file --batch` process per worker, working tree files straight from disk.
+    """
+
+    # smaller batches are parsed one by one, spawning the processes would take longer than the parsing
+    MIN_SOURCES = 50
+
+    def __init__(self, repo_path: str, workers: int = 0):
+        self.repo_path = repo_path
+        self.workers = Workers.get_count(workers)
+
+    def run(
+        self, sources: list[tuple[str, str]], from_disk: bool = False
+    ) -> Iterator[tuple[str, str, list[FunctionMetrics] | None]]:
+        """
+        Yields (file, blob, functions) in the same order as sources, functions is None if the file failed.
+        With from_disk the file is read from its path instead of the object database.
+        """
+        chunk_size = max(1, len(sources) // (self.workers * 4))
+        tasks = [(rel_path, blob, from_disk) for rel_path, blob in sources]
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.repo_path,)
+        ) as executor:
+            results = executor.map(_parse_source, tasks, chunksize=chunk_size)
+            for (rel_path, blob), functions in zip(sources, results, strict=True):
+                yield rel_path, blob, functions
+
+
+def _init_worker(repo_path: str) -> None:
+    global _worker_repo_path, _worker_analyzer
+    _worker_repo_path = repo_path
+    _worker_analyzer = lizard.FileAnalyzer(lizard.get_extensions([]))
+
+
+def _parse_source(task: tuple[str, str, bool]) -> list[FunctionMetrics] | None:
+    global _worker_reader
+    rel_path, blob, from_disk = task
+    try:
+        if from_disk:
+            raw = SnapshotAnalyzer.read_file(rel_path)
+        else:
+            if _worker_reader is None:
+                _worker_reader = BlobReader(Repo(_worker_repo_path))
+            raw = _worker_reader.read(blob)
+        return SnapshotAnalyzer.parse_source(_worker_analyzer, rel_path, raw)
+    except Exception:
+        return None  # parsed again in the main process, where the error is reported
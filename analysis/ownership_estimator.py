@@ -0,0 +1,52 @@
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+
+from entities.author import Author
+from entities.commit_record import CommitRecord
+
+
+class OwnershipEstimator:
+    """
+    Estimates the lines owned by every author of a file from the numstat history only, without blame.
+    Added lines belong to the commit author, deleted lines are taken from the current owners proportionally.
+    """
+
+    def __init__(self, paths: Iterable[str], find_author: Callable[[str], Author]):
+        self.find_author = find_author
+        # only the files still in the tree are tracked, everything else would be dropped at the end anyway
+        self.owners_per_file: dict[str, defaultdict[str, float]] = {path: defaultdict(float) for path in paths}
+
+    def estimate(self, commits: Iterable[CommitRecord]) -> dict[str, dict[str, int]]:
+        """Walks commits oldest first and returns lines per author (main username) of every tracked file"""
+        for commit in commits:
+            if not commit.author_email:
+                continue
+
+            author_name = None
+            for file_change in commit.files:
+                owners = self.owners_per_file.get(file_change.path)
+                if owners is None:
+                    continue
+
+                if file_change.deletions:
+                    OwnershipEstimator.__decay(owners, file_change.deletions)
+
+                if file_change.insertions:
+                    if author_name is None:
+                        author_name = self.find_author(commit.author_email).main_username
+                    owners[author_name] += file_change.insertions
+
+        return {
+            path: {author: round(lines) for author, lines in owners.items() if round(lines) > 0}
+            for path, owners in self.owners_per_file.items()
+        }
+
+    @staticmethod
+    def __decay(owners: defaultdict[str, float], deletions: int) -> None:
+        # nobody knows whose lines were deleted, so every owner loses the same share
+        total = sum(owners.values())
+        if total <= 0:
+            return
+        remaining = max(total - deletions, 0) / total
+        for author in owners:
+            owners[author] *= remaining
@@ -0,0 +1,158 @@
+from collections.abc import Callable, Iterator
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+HASH_BITS = 64
+
+# candidate pairs expanded at once, bounds the memory of a band with big buckets
+BLOCK_SIZE = 1 << 20
+
+# narrow bands find their buckets through a table indexed by band value instead of a binary search
+DIRECT_TABLE_BITS = 20
+
+_BYTE_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+class SimhashIndex:
+    """
+    Multi-index hashing over 64-bit simhashes: finds every pair within max_distance bits without comparing all pairs.
+    The hash is split into bands. Two hashes within max_distance bits have at least one band differing in at most
+    max_distance // bands bits, so each band gets its own bucket table and is probed with every such variation.
+    Candidates are expanded and checked in NumPy blocks, only pairs within max_distance come out.
+    """
+
+    def __init__(self, fingerprints: list[int], max_distance: int):
+        self.fingerprints = np.array(fingerprints, dtype=np.uint64)
+        self.max_distance = max(max_distance, 0)
+        self.bands, self.radius = SimhashIndex.choose_bands(len(fingerprints), self.max_distance)
+        self._band_ranges = SimhashIndex.__get_band_ranges(self.bands)
+
+    def find_pairs(self) -> tuple[np.ndarray, np.ndarray]:
+        """(left, right) indexes with left < right of every pair within max_distance bits, sorted"""
+        left_blocks = [np.empty(0, dtype=np.intp)]
+        right_blocks = [np.empty(0, dtype=np.intp)]
+        for band in range(self.bands if len(self.fingerprints) > 0 else 0):
+            for left, right in self.__iter_band_candidates(band):
+                left, right = self.__keep_new_pairs(left, right, band)
+                left_blocks.append(left)
+                right_blocks.append(right)
+
+        left = np.concatenate(left_blocks)
+        right = np.concatenate(right_blocks)
+        order = np.lexsort((right, left))
+        return left[order], right[order]
+
+    @staticmethod
+    def popcount(values: np.ndarray) -> np.ndarray:
+        """Bits set in every uint64"""
+        if hasattr(np, "bitwise_count"):  # NumPy 2
+            return np.bitwise_count(values)
+        return _BYTE_POPCOUNT[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+    @staticmethod
+    def choose_bands(count: int, max_distance: int) -> tuple[int, int]:
+        """
+        (bands, radius) with the lowest estimated work: bucket probes plus candidate pairs, assuming uniform hashes.
+        More bands mean narrower buckets with more collisions, fewer bands mean more variations to probe.
+        """
+        best = (max_distance + 1, 0)
+        best_cost = float("inf")
+        for bands in range(1, min(max_distance + 1, HASH_BITS) + 1):
+            width = HASH_BITS // bands
+            radius = max_distance // bands
+            probes = sum(comb(width, k) for k in range(radius + 1))
+            candidate_pairs = count * count / 2 * bands * probes / (1 << width)
+            cost = count * bands * probes + candidate_pairs
+            if cost < best_cost:
+                best, best_cost = (bands, radius), cost
+        return best
+
+    def __iter_band_candidates(self, band: int) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        # (left, right) blocks of every pair whose band values differ in at most radius bits, each pair once
+        shift, width = self._band_ranges[band]
+        band_values = (self.fingerprints >> np.uint64(shift)) & np.uint64((1 << width) - 1)
+        order = np.argsort(band_values, kind="stable")
+        values, starts, sizes = np.unique(band_values[order], return_index=True, return_counts=True)
+
+        buckets = np.arange(len(values))
+        find_bucket = SimhashIndex.__get_bucket_finder(values, width)
+        for variation in SimhashIndex.__get_variations(width, self.radius):
+            positions = find_bucket(values ^ np.uint64(variation))
+            # both directions of a variation find the same buckets, keep one, -1 means no bucket
+            sources = np.flatnonzero(positions >= buckets)
+            yield from SimhashIndex.__expand(order, starts, sizes, sources, positions[sources], variation == 0)
+
+    @staticmethod
+    def __expand(
+        order: np.ndarray,
+        starts: np.ndarray,
+        sizes: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        same_bucket: bool,
+    ) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        # every member of each source bucket with every member of its target bucket, in blocks of about BLOCK_SIZE
+        # a bucket paired with itself only gives each pair of distinct members once
+        target_sizes = sizes[targets]
+        products = sizes[sources] * target_sizes
+        ends = np.cumsum(products)
+        first = 0
+        while first < len(sources):
+            last = int(np.searchsorted(ends, (ends[first] - products[first]) + BLOCK_SIZE, side="right"))
+            last = max(last, first + 1)
+            block_products = products[first:last]
+            block_starts = np.cumsum(block_products) - block_products
+            offset = np.arange(int(block_products.sum())) - np.repeat(block_starts, block_products)
+            left_offset, right_offset = np.divmod(offset, np.repeat(target_sizes[first:last], block_products))
+            left = np.repeat(starts[sources[first:last]], block_products) + left_offset
+            right = np.repeat(starts[targets[first:last]], block_products) + right_offset
+            if same_bucket:
+                keep = left < right
+                left, right = left[keep], right[keep]
+            left, right = order[left], order[right]
+            yield np.minimum(left, right), np.maximum(left, right)
+            first = last
+
+    @staticmethod
+    def __get_bucket_finder(values: np.ndarray, width: int) -> Callable[[np.ndarray], np.ndarray]:
+        # bucket index of every band value, -1 when there is none
+        if width <= DIRECT_TABLE_BITS:
+            table = np.full(1 << width, -1, dtype=np.intp)
+            table[values.astype(np.intp)] = np.arange(len(values))
+            return lambda targets: table[targets.astype(np.intp)]
+
+        def search(targets: np.ndarray) -> np.ndarray:
+            positions = np.minimum(np.searchsorted(values, targets), len(values) - 1)
+            return np.where(values[positions] == targets, positions, -1)
+
+        return search
+
+    def __keep_new_pairs(self, left: np.ndarray, right: np.ndarray, band: int) -> tuple[np.ndarray, np.ndarray]:
+        # within distance, and not already found through an earlier band
+        diff = self.fingerprints[left] ^ self.fingerprints[right]
+        keep = SimhashIndex.popcount(diff) <= self.max_distance
+        left, right, diff = left[keep], right[keep], diff[keep]
+        keep = np.ones(len(diff), dtype=bool)
+        for shift, width in self._band_ranges[:band]:
+            band_diff = (diff >> np.uint64(shift)) & np.uint64((1 << width) - 1)
+            keep &= SimhashIndex.popcount(band_diff) > self.radius
+        return left[keep], right[keep]
+
+    @staticmethod
+    def __get_band_ranges(bands: int) -> list[tuple[int, int]]:
+        # (shift, width) of every band, the first ones get the leftover bits
+        base, extra = divmod(HASH_BITS, bands)
+        ranges = []
+        shift = 0
+        for band in range(bands):
+            width = base + (1 if band < extra else 0)
+            ranges.append((shift, width))
+            shift += width
+        return ranges
+
+    @staticmethod
+    def __get_variations(width: int, radius: int) -> list[int]:
+        # every mask of at most radius bits set among width bits
+        return [sum(1 << bit for bit in bits) for k in range(radius + 1) for bits in combinations(range(width), k)]
@@ -0,0 +1,189 @@
+import codecs
+import os
+from collections.abc import Callable, Iterable
+from fnmatch import fnmatch
+
+import lizard
+from git import Repo
+
+from analysis.blob_reader import BlobReader
+from analysis.git_history import GitHistory
+from analysis.lizard_cache import LizardCache, LizardMemory
+from entities.function_metrics import FunctionMetrics
+
+
+class SnapshotAnalyzer:
+    """
+    Runs lizard on the files of any commit without checking it out, or on the tracked files of the working tree.
+    Blobs are read from the object database and parsed in memory.
+    Only tracked files in a language lizard supports, and not excluded by extension or path, are ever read.
+    With a cache, a blob already seen in another commit (or in the working tree) is never read nor parsed again.
+    """
+
+    def __init__(
+        self,
+        repo: Repo,
+        history: GitHistory,
+        cache: LizardCache | None = None,
+        exclude_extensions: Iterable[str] = (),
+        exclude_paths: Iterable[str] = (),
+    ):
+        self._repo = repo
+        self._history = history
+        self._cache = cache
+        self.exclude_extensions = {ext.lower() for ext in exclude_extensions}
+        self.exclude_paths = list(exclude_paths)
+        self._parsed = LizardMemory()  # parsed elsewhere when there is no cache, bounded like the cache memory
+        self._source_files: dict[str, list[tuple[str, str]]] = {}
+        self._file_blobs: dict[str, str] | None = None  # loaded for every tracked file at once
+        self._blob_reader: BlobReader | None = None  # started on the first blob read
+        self._file_analyzer = lizard.FileAnalyzer(lizard.get_extensions([]))
+
+    def close(self) -> None:
+        if self._blob_reader is not None:
+            self._blob_reader.close()
+
+    def analyze(self, rev: str) -> list[tuple[str, FunctionMetrics]]:
+        """(file, function) of every function found in the tree of rev"""
+        functions = []
+        try:
+            for rel_path, blob in self.get_source_files(rev):
+                functions += [(rel_path, function) for function in self.analyze_blob(rel_path, blob)]
+        finally:
+            # the files of a rev are only kept from get_source_files until the rev is analysed
+            self._source_files.pop(rev, None)
+        return functions
+
+    def get_source_files(self, rev: str) -> list[tuple[str, str]]:
+        if rev in self._source_files:
+            return self._source_files[rev]
+
+        source_files = []
+        seen_blobs: set[str] = set()
+        for rel_path, blob in self._history.get_tree_blobs(rev, include_symlinks=False):
+            if not self.is_source_file(rel_path):
+                continue
+            if blob in seen_blobs:
+                continue  # files with the same content are analysed once, as lizard does
+            seen_blobs.add(blob)
+            source_files.append((rel_path, blob))
+
+        self._source_files[rev] = source_files
+        return source_files
+
+    def get_working_tree_files(self, distinct_blobs: bool = True) -> list[str]:
+        """
+        Paths on disk of the tracked source files, build output, dependencies and untracked files are never listed.
+        With distinct_blobs, files with the same content as a previous one are left out.
+        """
+        source_files = []
+        seen_blobs: set[str] = set()
+        for rel_path in self._history.get_tracked_paths():
+            if not self.is_source_file(rel_path):
+                continue
+
+            file_path = os.path.join(self._repo.working_tree_dir, *rel_path.split("/"))
+            if os.path.islink(file_path) or not os.path.isfile(file_path):
+                continue  # deleted but not staged yet
+            if not distinct_blobs:
+                source_files.append(file_path)
+                continue
+
+            blob = self.get_file_blob(file_path)
+            if blob in seen_blobs:
+                continue
+            seen_blobs.add(blob)
+            source_files.append(file_path)
+        return source_files
+
+    def is_source_file(self, rel_path: str) -> bool:
+        if lizard.get_reader_for(rel_path) is None:
+            return False  # language not supported by lizard
+        if os.path.splitext(rel_path)[1].lstrip(".").lower() in self.exclude_extensions:
+            return False
+        return not any(fnmatch(rel_path, pattern) for pattern in self.exclude_paths)
+
+    def get_unparsed(self, sources: list[tuple[str, str]]) -> list[tuple[str, str]]:
+        """Sources whose content was never parsed, each content only once"""
+        unparsed = {}
+        for rel_path, blob in sources:
+            key = LizardCache.get_key(blob, rel_path)
+            if key in unparsed:
+                continue
+            parsed = self._cache.contains(key) if self._cache is not None else key in self._parsed
+            if not parsed:
+                unparsed[key] = (rel_path, blob)
+        return list(unparsed.values())
+
+    def add_parsed(self, rel_path: str, blob: str, functions: list[FunctionMetrics]) -> None:
+        """Stores functions parsed outside of this analyzer, e.g. by a LizardPool"""
+        key = LizardCache.get_key(blob, rel_path)
+        if self._cache is not None:
+            self._cache.put(key, functions, prefetched=True)
+        else:
+            self._parsed.put(key, functions)
+
+    def analyze_blob(self, rel_path: str, blob: str) -> list[FunctionMetrics]:
+        return self.__analyze_cached(rel_path, blob, lambda: self.__read_blob(blob))
+
+    def analyze_file(self, file_path: str) -> list[FunctionMetrics]:
+        """Same as analyze_blob for a file on disk, keyed by the blob sha git stores for it"""
+        return self.__analyze_cached(file_path, self.get_file_blob(file_path), lambda: SnapshotAnalyzer.read_file(file_path))
+
+    def get_file_blob(self, file_path: str) -> str:
+        """
+        Blob sha of the file after git's clean and eol filters, not of its bytes on disk.
+        With core.autocrlf the checkout has CRLF while the commit has LF, both get the same sha.
+        """
+        if self._file_blobs is None:
+            root = self._repo.working_tree_dir
+            self._file_blobs = {
+                os.path.join(root, *rel_path.split("/")): blob for rel_path, blob in self._history.get_working_tree_blobs().items()
+            }
+        blob = self._file_blobs.get(file_path)
+        if blob is None:
+            blob = self._history.hash_paths([file_path])[0]
+            self._file_blobs[file_path] = blob
+        return blob
+
+    def __read_blob(self, blob: str) -> bytes:
+        if self._blob_reader is None:
+            self._blob_reader = BlobReader(self._repo)
+        return self._blob_reader.read(blob)
+
+    def __analyze_cached(self, rel_path: str, blob: str, read_raw: Callable[[], bytes]) -> list[FunctionMetrics]:
+        key = LizardCache.get_key(blob, rel_path)
+        functions = self.__get_parsed(key)
+        if functions is not None:
+            return functions
+
+        functions = SnapshotAnalyzer.parse_source(self._file_analyzer, rel_path, read_raw())
+        if self._cache is not None:
+            self._cache.put(key, functions)
+        return functions
+
+    def __get_parsed(self, key: str) -> list[FunctionMetrics] | None:
+        if self._cache is not None:
+            return self._cache.get(key)
+        return self._parsed.get(key)
+
+    @staticmethod
+    def parse_source(file_analyzer: lizard.FileAnalyzer, rel_path: str, raw: bytes) -> list[FunctionMetrics]:
+        file_info = file_analyzer.analyze_source_code(rel_path, SnapshotAnalyzer.decode_source(raw))
+        return [FunctionMetrics.from_lizard(function) for function in file_info.function_list]
+
+    @staticmethod
+    def read_file(file_path: str) -> bytes:
+        with open(file_path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def decode_source(raw: bytes) -> str:
+        """Same text lizard gets when it reads the file from disk"""
+        try:
+            encoding = "utf-8-sig" if raw.startswith(codecs.BOM_UTF8) else "utf-8"
+            text = raw.decode(encoding)
+        except UnicodeDecodeError:
+            return raw.decode("utf-8", errors="ignore")
+        # files are opened in text mode, with universal newlines
+        return text.replace("\r\n", "\n").replace("\r", "\n")
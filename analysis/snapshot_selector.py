@@ -0,0 +1,129 @@
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+from git import Commit
+
+from entities.complexity_trend import ComplexityTrendData
+from entities.preferences import TrendGranularity, TrendSampling
+
+
+class SnapshotSelector:
+    """
+    Picks the commits analysed by the complexity trend, one per period and at most max_snapshots.
+    Uniform sampling spreads them evenly. Adaptive sampling starts from a coarse set and spends the rest of the
+    budget bisecting the intervals where the complexity changed the most.
+    """
+
+    def __init__(
+        self,
+        granularity: TrendGranularity,
+        max_snapshots: int = 0,
+        sampling: TrendSampling = TrendSampling.UNIFORM,
+        change_threshold: float = 0.05,
+    ):
+        self.granularity = granularity
+        self.max_snapshots = max_snapshots
+        self.sampling = sampling
+        self.change_threshold = change_threshold
+
+    def get_buckets(self, commits: Iterable[Commit]) -> list[tuple[str, Commit]]:
+        """(period, commit) sorted by period, commits newest first so every period keeps its latest commit"""
+        buckets: dict[str, Commit] = {}
+        for commit in commits:
+            period = SnapshotSelector.get_period(commit.committed_datetime.replace(tzinfo=None), self.granularity)
+            if period not in buckets:
+                buckets[period] = commit
+        return sorted(buckets.items())
+
+    def get_candidates(self, buckets: list[tuple[str, Commit]]) -> list[tuple[str, Commit]]:
+        """Snapshots iter_levels picks from: all of them when adaptive, the evenly spaced ones otherwise"""
+        if self.sampling == TrendSampling.ADAPTIVE:
+            return buckets
+        return [buckets[i] for i in SnapshotSelector.get_evenly_spaced(len(buckets), self.max_snapshots)]
+
+    def iter_levels(self, count: int, trends: dict[int, ComplexityTrendData | None]) -> Iterator[list[int]]:
+        """
+        Indexes of the candidates to analyse, level by level.
+        The caller stores the result of every index in trends before asking for the next level.
+        """
+        if self.sampling != TrendSampling.ADAPTIVE:
+            yield from SnapshotSelector.get_refinement_levels(count)
+            return
+
+        budget = min(self.max_snapshots, count) if self.max_snapshots > 0 else count
+        yield SnapshotSelector.get_evenly_spaced(count, max(2, budget // 2))
+
+        while (remaining := budget - len(trends)) > 0:
+            change_points = self.__get_change_points(trends, remaining)
+            if not change_points:
+                return
+            yield change_points
+
+    @staticmethod
+    def get_change(a: ComplexityTrendData, b: ComplexityTrendData) -> float:
+        """Relative change of average CCN or function count, whichever is bigger"""
+        ccn_change = abs(b.avg_ccn - a.avg_ccn) / max(a.avg_ccn, 1)
+        count_change = abs(b.function_count - a.function_count) / max(a.function_count, 1)
+        return max(ccn_change, count_change)
+
+    @staticmethod
+    def get_evenly_spaced(count: int, limit: int) -> list[int]:
+        # 0 means no limit, the first and last indexes are always kept
+        if limit <= 0 or count <= limit:
+            return list(range(count))
+        if limit == 1:
+            return [count - 1]
+
+        last = limit - 1
+        return list(dict.fromkeys(round(i * (count - 1) / last) for i in range(limit)))
+
+    @staticmethod
+    def get_period(date: datetime, granularity: TrendGranularity) -> str:
+        match granularity:
+            case TrendGranularity.DAY:
+                return date.strftime("%Y-%m-%d")
+            case TrendGranularity.WEEK:
+                iso = date.isocalendar()
+                return f"{iso.year}-W{iso.week:02d}"
+            case TrendGranularity.QUARTER:
+                return f"{date.year}-Q{(date.month - 1) // 3 + 1}"
+            case _:
+                return date.strftime("%Y-%m")
+
+    @staticmethod
+    def get_refinement_levels(count: int) -> list[list[int]]:
+        """
+        Indexes 0..count-1 grouped coarse to fine: both ends, then the middle, then the quarters...
+        Stopping after any level leaves snapshots spread over the whole history.
+        """
+        if count <= 0:
+            return []
+        levels = [list(dict.fromkeys([0, count - 1]))]
+        intervals = [(0, count - 1)]
+        while intervals:
+            level = []
+            next_intervals = []
+            for start, end in intervals:
+                if end - start < 2:
+                    continue
+                middle = (start + end) // 2
+                level.append(middle)
+                next_intervals += [(start, middle), (middle, end)]
+            if level:
+                levels.append(level)
+            intervals = next_intervals
+        return levels
+
+    def __get_change_points(self, trends: dict[int, ComplexityTrendData | None], limit: int) -> list[int]:
+        # middle of every interval whose ends differ more than the threshold, biggest changes first
+        candidates = []
+        analyzed = sorted(trends)
+        for start, end in zip(analyzed, analyzed[1:], strict=False):
+            if end - start < 2 or trends[start] is None or trends[end] is None:
+                continue
+            change = SnapshotSelector.get_change(trends[start], trends[end])
+            if change > self.change_threshold:
+                candidates.append((change, (start + end) // 2))
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        return sorted(index for _, index in candidates[:limit])
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class SourceLineCache:
+    """
+    Decoded lines of the most recently used source files, so a file is read once for all its functions.
+    Bounded by the total size of the cached files, the least recently used ones are dropped first.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._files: OrderedDict[str, tuple[list[str], int]] = OrderedDict()
+
+    def get_lines(self, filename: str) -> list[str]:
+        cached = self._files.get(filename)
+        if cached is not None:
+            self._files.move_to_end(filename)
+            return cached[0]
+
+        with open(filename, "rb") as f:
+            raw = f.read()
+
+        lines = SourceLineCache.decode(raw).splitlines()
+        self.__add(filename, lines, len(raw))
+        return lines
+
+    def clear(self) -> None:
+        self._files.clear()
+        self.total_bytes = 0
+
+    @staticmethod
+    def decode(raw: bytes) -> str:
+        # try utf-8 first
+        try:
+            return raw.decode("utf-8")
+        except UnicodeDecodeError:
+            # fallback encoding
+            return raw.decode("latin-1", errors="ignore")
+
+    def __add(self, filename: str, lines: list[str], size: int) -> None:
+        self._files[filename] = (lines, size)
+        self.total_bytes += size
+        # the file just read always stays, even when it is bigger than the limit on its own
+        while self.total_bytes > self.max_bytes and len(self._files) > 1:
+            _, (_, evicted_size) = self._files.popitem(last=False)
+            self.total_bytes -= evicted_size
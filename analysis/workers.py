@@ -0,0 +1,10 @@
+import os
+
+
+class Workers:
+    """Worker count of the thread and process pools, shared by every Workers preference"""
+
+    @staticmethod
+    def get_count(workers: int) -> int:
+        # 0 (or less) means one worker per core
+        return workers if workers > 0 else (os.cpu_count() or 1)
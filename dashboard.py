@@ -25,6 +25,9 @@ class Dashboard:
             data_table_code_duplication = Dashboard.__list_to_html_table(
                 data.csv_code_duplication, "tableCodeDuplication", "|"
             )
+            data_table_code_clones = Dashboard.__list_to_html_table(
+                data.csv_code_clones, "tableCodeClones", "|"
+            )
             data_table_bus_factor_summary = Dashboard.__list_to_html_table(
                 data.csv_bus_factor_summary, "tableBusFactorSummary"
             )
@@ -41,6 +44,7 @@ class Dashboard:
                 data_table_code_complexity_summary,
                 data_table_code_complexity,
                 data_table_code_duplication,
+                data_table_code_clones,
                 data_table_bus_factor_summary,
                 data_table_bus_factor,
                 data_table_complexity_trend,
@@ -119,6 +123,7 @@ class Dashboard:
         data_table_code_complexity_summary: str,
         data_table_code_complexity: str,
         data_table_code_duplication: str,
+        data_table_code_clones: str,
         data_table_bus_factor_summary: str,
         data_table_bus_factor: str,
         data_table_complexity_trend: str,
@@ -167,6 +172,14 @@ class Dashboard:
                 "lengthMenu": [5, 10, 20, 50, 100],
                 "order": [0, "asc"]
             }});
+            $('#tableCodeClones').DataTable({{
+                "pageLength": 20,
+                "lengthMenu": [5, 10, 20, 50, 100],
+                "order": [],
+                "rowGroup": {{
+                    dataSrc: 0
+                }}
+            }});
             $('#tableBusFactorSummary').DataTable({{
                 "pageLength": 20,
                 "lengthMenu": [5, 10, 20, 50, 100],
@@ -430,6 +443,30 @@ class Dashboard:
 
         {data_table_code_duplication}
 
+        <h3> Duplicated Code Blocks</h3>
+
+        <details class="chart-info">
+            <summary>ℹ️ Data description</summary>
+            <aside>
+                <p>
+                    This table shows runs of identical code found anywhere in the tracked source files,
+                    including blocks copied inside larger functions or outside any function.
+                    Comments, whitespace and formatting are ignored.
+                    Every copy of the same block is listed under one clone, longest clones first.
+                </p>
+
+                <h4>How to read it</h4>
+                <ul>
+                    <li><strong>Clone</strong>: the duplicated block, its copies are grouped under it.</li>
+                    <li><strong>Copies</strong>: number of places the block was found in, they can be in the same file.</li>
+                    <li><strong>File / Lines</strong>: file and line range of each copy.</li>
+                    <li><strong>Tokens</strong>: length of each copy, in tokens (keywords, names, operators, literals).</li>
+                </ul>
+            </aside>
+        </details>
+
+        {data_table_code_clones}
+
 
         <h2>Code ownership</h2>
 
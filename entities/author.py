@@ -20,14 +20,6 @@ class Author:
             f"emails: {self.emails}, usernames: {self.usernames}"
         )
 
-    def get_pos_inside(self, authors: list["Author"]) -> int:
-        for i, author in enumerate(authors):
-            if self.main_email in author.emails:
-                return i
-            if self.main_username.lower() == author.main_username.lower():
-                return i
-        return -1
-
     def add_username_alias_if_not_saved(self, username: str) -> None:
         if username not in self.usernames:
             self.usernames.append(username)
@@ -36,13 +28,6 @@ class Author:
         if main_email not in self.emails:
             self.emails.append(main_email)
 
-    @staticmethod
-    def get_author_by_username(authors: list["Author"], username: str):
-        for author in authors:
-            if author.main_username == username or username in author.usernames:
-                return author
-        return None
-
     @staticmethod
     def get_unknown_author():
         return Author("unknown", "Unknown")
\ No newline at end of file
@@ -0,0 +1,102 @@
+from entities.author import Author
+
+NOREPLY_DOMAIN = "noreply.github.com"
+
+
+class AuthorIndex:
+    """
+    Groups every (email, name) identity found in the history into authors.
+    Identities sharing an email or a name are merged with a union-find, then all lookups are dict based.
+    """
+
+    def __init__(self) -> None:
+        self.authors: list[Author] = []
+        self._parent: dict[tuple[str, str], tuple[str, str]] = {}
+        self._identities: dict[tuple[str, str], None] = {}  # insertion ordered set of (email, name)
+        self._alias_emails: dict[str, None] = {}  # emails rewritten by .mailmap, still used by raw git data
+        self._by_email: dict[str, Author] = {}
+        self._by_username: dict[str, Author] = {}
+
+    def add_identity(self, email: str, name: str, alias_email: str = "") -> None:
+        email = email.lower()
+        name = name.strip()
+        if not email or not name:
+            return
+
+        email_key = ("email", email)
+        alias_email = alias_email.lower()
+        if alias_email and alias_email != email and alias_email not in self._alias_emails:
+            self._alias_emails[alias_email] = None
+            self.__union(email_key, ("email", alias_email))
+
+        if (email, name) in self._identities:
+            return
+
+        self._identities[(email, name)] = None
+        self.__union(email_key, ("name", name.lower()))
+
+        # github noreply addresses carry the login, e.g. 12345+login@users.noreply.github.com
+        login = AuthorIndex.__get_noreply_login(email)
+        if login:
+            self.__union(email_key, ("name", login.lower()))
+
+    def build(self) -> list[Author]:
+        clusters: dict[tuple[str, str], list[tuple[str, str]]] = {}
+
+        # real emails first, so they become the main identity of their author
+        ordered = [i for i in self._identities if not AuthorIndex.is_noreply(i[0])]
+        ordered += [i for i in self._identities if AuthorIndex.is_noreply(i[0])]
+        for email, name in ordered:
+            clusters.setdefault(self.__find(("email", email)), []).append((email, name))
+
+        aliases: dict[tuple[str, str], list[str]] = {}
+        for alias_email in self._alias_emails:
+            aliases.setdefault(self.__find(("email", alias_email)), []).append(alias_email)
+
+        self.authors = []
+        self._by_email = {}
+        self._by_username = {}
+        for root, identities in clusters.items():
+            main_email, main_username = identities[0]
+            emails = list(dict.fromkeys([*(email for email, _ in identities), *aliases.get(root, [])]))
+            usernames = [n for n in dict.fromkeys(name for _, name in identities) if n != main_username]
+            author = Author(main_email, main_username, usernames, emails)
+
+            self.authors.append(author)
+            for email in emails:
+                self._by_email[email] = author
+            for username in [main_username, *usernames]:
+                self._by_username.setdefault(username.lower(), author)
+
+        return self.authors
+
+    def find_by_email(self, email: str) -> Author | None:
+        return self._by_email.get(email.lower())
+
+    def find_by_username(self, username: str) -> Author | None:
+        return self._by_username.get(username.strip().lower())
+
+    @staticmethod
+    def is_noreply(email: str) -> bool:
+        return NOREPLY_DOMAIN in email
+
+    @staticmethod
+    def __get_noreply_login(email: str) -> str:
+        if not AuthorIndex.is_noreply(email):
+            return ""
+        local_part = email.split("@", 1)[0]
+        return local_part.split("+", 1)[-1]
+
+    def __find(self, key: tuple[str, str]) -> tuple[str, str]:
+        self._parent.setdefault(key, key)
+        while self._parent[key] != key:
+            # path halving keeps the trees flat
+            self._parent[key] = self._parent[self._parent[key]]
+            key = self._parent[key]
+        return key
+
+    def __union(self, a: tuple[str, str], b: tuple[str, str]) -> None:
+        root_a = self.__find(a)
+        root_b = self.__find(b)
+        if root_a != root_b:
+            self._parent[root_b] = root_a
@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class CloneLocation:
+    file: str
+    lines: str
+    tokens: int  # length of this copy, copies can match different parts of the first one
+
+    def to_csv(self) -> str:
+        return f"{self.file}|{self.lines}|{self.tokens}"
+
+
+@dataclass
+class CloneData:
+    tokens: int  # length of the duplicated code in its first copy
+    locations: list[CloneLocation]  # every copy, the first one is where it was found first
+
+    def to_csv(self, clone_id: int) -> list[str]:
+        return [f"Clone {clone_id}|{len(self.locations)}|{location.to_csv()}" for location in self.locations]
+
+    @staticmethod
+    def csv_header() -> str:
+        return "Clone|Copies|File|Lines|Tokens"
+
+    @staticmethod
+    def to_csv_data_list(stats: list["CloneData"], header: bool = True) -> list[str]:
+        data = [CloneData.csv_header()] if header else []
+        for clone_id, stat in enumerate(stats, start=1):
+            data += stat.to_csv(clone_id)
+        return data
@@ -0,0 +1,33 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from git.objects.util import tzoffset
+
+
+@dataclass
+class FileChange:
+    path: str
+    insertions: int
+    deletions: int
+
+    @property
+    def lines(self) -> int:
+        return self.insertions + self.deletions
+
+
+@dataclass
+class CommitRecord:
+    """Lightweight view of a commit as read from `git log --numstat`"""
+    sha: str
+    author_name: str
+    author_email: str
+    committed_datetime: datetime  # timezone aware, as reported by git
+    files: list[FileChange] = field(default_factory=list)
+
+    @staticmethod
+    def parse_date(value: str) -> datetime:
+        """Parses an ISO date keeping the same tzinfo as GitPython's committed_datetime"""
+        date = datetime.fromisoformat(value)
+        utc_offset = date.utcoffset()
+        secs_west_of_utc = -utc_offset.total_seconds() if utc_offset is not None else 0
+        return date.replace(tzinfo=tzoffset(secs_west_of_utc))
@@ -20,6 +20,7 @@ class Data:
     csv_code_complexity_summary: list[str]
     csv_code_complexity: list[str]
     csv_code_duplication: list[str]
+    csv_code_clones: list[str]
     csv_bus_factor_summary: list[str]
     csv_bus_factor: list[str]
     chart_complexity_trend: str
@@ -0,0 +1,28 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class FunctionMetrics:
+    """Lizard numbers of one function, without its code"""
+
+    name: str
+    start_line: int
+    end_line: int
+    nloc: int
+    ccn: int
+    token: int
+    param: int
+    length: int
+
+    @staticmethod
+    def from_lizard(function) -> "FunctionMetrics":
+        return FunctionMetrics(
+            name=function.name,
+            start_line=function.start_line,
+            end_line=function.end_line,
+            nloc=function.nloc,
+            ccn=function.cyclomatic_complexity,
+            token=function.token_count,
+            param=function.parameter_count,
+            length=function.length,
+        )
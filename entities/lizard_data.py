@@ -1,7 +1,10 @@
 import difflib
-from collections import defaultdict
+import math
+from collections import Counter, defaultdict
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import cached_property
 from typing import cast
 
 from simhash import Simhash
@@ -40,10 +43,9 @@ class LizardData:
     token: int  # code size metric
     param: int  # params number
     length: int  # function row length (similar to nloc but including declarations, exc...)
-    code: str
     location: LizardLocation  # location function
+    code_loader: Callable[[], str] = field(default=lambda: "", repr=False, compare=False)  # only called if code is used
     status: Status = field(init=False)
-    hash_value: int = field(init=False, repr=False)
 
 
     def __post_init__(self):
@@ -56,10 +58,22 @@ class LizardData:
         else:
             self.status = Status.AT_RISK
 
-        self.hash_value = int(cast(int, Simhash(self.code.split()).value))
+    # code and fingerprint are only needed by the duplication check, so they are computed on first use
+    @cached_property
+    def code(self) -> str:
+        return self.code_loader()
+
+    @cached_property
+    def hash_value(self) -> int:
+        return int(cast(int, Simhash(self.code.split()).value))
+
+    @cached_property
+    def char_counts(self) -> Counter[str]:
+        return Counter(self.code)
 
     # to obtain a propotional score based on data importance
-    def similarity_score(self, other: "LizardData") -> float:
+    # inf as soon as the score cannot be within max_score, so most pairs never compare their code
+    def similarity_score(self, other: "LizardData", max_score: float = math.inf) -> float:
         diff_nloc = abs(self.nloc - other.nloc)
         diff_ccn = abs(self.ccn - other.ccn)
         diff_token = abs(self.token - other.token)
@@ -75,6 +89,20 @@ class LizardData:
             + 0.1 * diff_length
         )
 
+        if 0.6 * numeric_score > max_score:
+            return math.inf
+
+        # code sizes and then character counts bound difflib's ratio from above, like its real_quick_ratio and quick_ratio
+        # the counts are kept per function, so only the pairs left are compared with difflib itself
+        total = len(self.code) + len(other.code)
+        if total > 0:
+            size_bound = 2 * min(len(self.code), len(other.code)) / total
+            if 0.6 * numeric_score + 0.4 * (1 - size_bound) * 100 > max_score:
+                return math.inf
+            count_bound = 2 * (self.char_counts & other.char_counts).total() / total
+            if 0.6 * numeric_score + 0.4 * (1 - count_bound) * 100 > max_score:
+                return math.inf
+
         text_similarity = difflib.SequenceMatcher(None, self.code, other.code).ratio()
         text_score = (1 - text_similarity) * 100  # 0 = same, 100 = completly diference
 
@@ -11,3 +11,12 @@ class PeriodFilter:
         start_str = self.start_date.strftime("%d/%m/%Y") if self.start_date else "N/A"
         end_str = self.end_date.strftime("%d/%m/%Y") if self.end_date else "N/A"
         return f"{start_str} - {end_str}"
+
+    def contains(self, date: datetime) -> bool:
+        # the period is naive, so it is compared with the wall-clock time the commit was made at
+        date = date.replace(tzinfo=None)
+        if self.start_date and date < self.start_date:
+            return False
+        if self.end_date and date > self.end_date:
+            return False
+        return True
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import Enum
 
 
 @dataclass
@@ -6,24 +7,56 @@ class AuthorStatsPreferences:
     ExcludeExtensions: set[str]
 
 
+class OwnershipMode(Enum):
+    BLAME = "blame"  # exact, line level
+    FAST = "fast"  # estimated from the numstat history
+
+
 @dataclass
 class CodeOwnershipPreference:
     ExcludeExtensions: set[str]
     ShowZeroPercentAuthorsIfLessThan: int
+    Workers: int = 0
+    Mode: OwnershipMode = OwnershipMode.BLAME
 
 
 @dataclass
 class CodeDuplicationPreference:
     Threshold: float
-    WindowSize: int
     MaxHammingDiff: int
     MaxNlocDiff: int
+    Workers: int = 0
+    MinCloneTokens: int = 50
 
 
 @dataclass
 class CodeComplexityPreference:
     ExcludeExtensions: set[str]
     ExcludeFunctions: set[str]
+    Workers: int = 0
+    ExcludePaths: list[str] = field(default_factory=list)
+
+
+class TrendGranularity(Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+    QUARTER = "quarter"
+
+
+class TrendSampling(Enum):
+    UNIFORM = "uniform"  # evenly spaced snapshots
+    ADAPTIVE = "adaptive"  # more snapshots where the complexity changes
+
+
+@dataclass
+class ComplexityTrendPreference:
+    Granularity: TrendGranularity = TrendGranularity.MONTH
+    MaxSnapshots: int = 60  # 0 = every period
+    TimeBudgetSeconds: int = 0  # 0 = no limit
+    Sampling: TrendSampling = TrendSampling.UNIFORM
+    ChangeThreshold: float = 0.05  # relative change that makes an interval worth bisecting
+    Workers: int = 0
 
 
 @dataclass
@@ -32,3 +65,4 @@ class Preferences:
     CodeOwnership: CodeOwnershipPreference
     CodeDuplication: CodeDuplicationPreference
     CodeComplexity: CodeComplexityPreference
+    ComplexityTrend: ComplexityTrendPreference = field(default_factory=ComplexityTrendPreference)
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass
+class RefRecord:
+    """A branch tip as read from `git for-each-ref`"""
+    name: str
+    sha: str
+    committed_datetime: datetime  # timezone aware, as reported by git
+    author_email: str
+
+
+@dataclass
+class RefCounts:
+    commits: int  # commits reachable from the tip
+    ahead: int | None = None  # commits not reachable from the default branch
+    behind: int | None = None  # commits of the default branch not reachable from the tip
@@ -4,21 +4,27 @@ from entities.author import Author
 
 
 class BranchStats:
-    def __init__(self, name: str, author: Author, commits: int, date: datetime):
+    def __init__(
+        self, name: str, author: Author, commits: int, date: datetime, ahead: int | None = None, behind: int | None = None
+    ):
         self.name = name
         self.author = author
         self.commits = commits
         self.date = date
+        self.ahead = ahead  # compared to the default branch
+        self.behind = behind
 
     def __str__(self) -> str:
         return f"name: {self.name}, author: {self.author.main_username}, commits: {self.commits}, date: {self.date.strftime('%Y-%m')}"
 
     def to_csv(self) -> str:
-        return f"{self.name},{self.author.main_username},{self.date.strftime('%Y-%m')}"
+        ahead = self.ahead if self.ahead is not None else ""
+        behind = self.behind if self.behind is not None else ""
+        return f"{self.name},{self.author.main_username},{self.date.strftime('%Y-%m')},{self.commits},{ahead},{behind}"
 
     @staticmethod
     def csv_header() -> str:
-        return "Branch,Author,Date"
+        return "Branch,Author,Date,Commits,Ahead,Behind"
 
     @staticmethod
     def to_csv_data_list(stats: list["BranchStats"], header: bool = True) -> list[str]:
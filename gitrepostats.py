@@ -1,5 +1,8 @@
+from multiprocessing import freeze_support
+
 from gui import GUI
 
 if __name__ == "__main__":
+    freeze_support()  # process pools in frozen executables
     app = GUI()
     app.mainloop()
@@ -5,7 +5,11 @@ from entities.preferences import (
     CodeComplexityPreference,
     CodeDuplicationPreference,
     CodeOwnershipPreference,
+    ComplexityTrendPreference,
+    OwnershipMode,
     Preferences,
+    TrendGranularity,
+    TrendSampling,
 )
 
 PREFERENCE_FILE_PATH = "./config/preferences.yaml"
@@ -23,6 +27,7 @@ class PreferenceReader:
                     code_ownership = config["CodeOwnership"]
                     code_duplication = config["CodeDuplication"]
                     code_complexity = config["CodeComplexity"]
+                    complexity_trend = config.get("ComplexityTrend") or {}  # optional section
                 except KeyError as e:
                     raise KeyError(f"Missing section on file YAML: {e}") from e
 
@@ -31,16 +36,29 @@ class PreferenceReader:
                     code_ownership_pref = CodeOwnershipPreference(
                         code_ownership["ExcludeExtensions"],
                         code_ownership["ShowZeroPercentAuthorsIfLessThan"],
+                        code_ownership.get("Workers", 0),  # one per core if missing
+                        OwnershipMode(code_ownership.get("Mode", OwnershipMode.BLAME.value)),
                     )
                     code_duplication_pref = CodeDuplicationPreference(
                         code_duplication["Threshold"],
-                        code_duplication["WindowSize"],
                         code_duplication["MaxHammingDiff"],
                         code_duplication["MaxNlocDiff"],
+                        code_duplication.get("Workers", 0),  # one per core if missing
+                        code_duplication.get("MinCloneTokens", 50),
                     )
                     code_complexity_pref = CodeComplexityPreference(
                         code_complexity.get("ExcludeExtensions", []),  # empty if missing
                         code_complexity.get("ExcludeFunctions", []),
+                        code_complexity.get("Workers", 0),  # one per core if missing
+                        code_complexity.get("ExcludePaths") or [],
+                    )
+                    complexity_trend_pref = ComplexityTrendPreference(
+                        Granularity=TrendGranularity(complexity_trend.get("Granularity", TrendGranularity.MONTH.value)),
+                        MaxSnapshots=complexity_trend.get("MaxSnapshots", 60),
+                        TimeBudgetSeconds=complexity_trend.get("TimeBudgetSeconds", 0),  # no limit if missing
+                        Sampling=TrendSampling(complexity_trend.get("Sampling", TrendSampling.UNIFORM.value)),
+                        ChangeThreshold=complexity_trend.get("ChangeThreshold", 0.05),
+                        Workers=complexity_trend.get("Workers", 0),  # one per core if missing
                     )
                 except KeyError as e:
                     raise KeyError(f"Missing key in the YAML file: {e}")
@@ -50,6 +68,7 @@ class PreferenceReader:
                     code_ownership_pref,
                     code_duplication_pref,
                     CodeComplexity=code_complexity_pref,
+                    ComplexityTrend=complexity_trend_pref,
                 )
 
         except FileNotFoundError:
@@ -1,21 +1,41 @@
 import os
-import tempfile
-import shutil
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from functools import partial
+from typing import TypeVar
 
-import lizard
+import numpy as np
 from git import Repo
 from pathlib import Path
 
+from analysis.blame_cache import BlameCache
+from analysis.blame_runner import BlameRunner
+from analysis.clone_detector import CloneDetector
+from analysis.commit_collectors import AuthorStatsCollector, CommitPipeline, CommitStatsCollector, FileStatsCollector
+from analysis.duplication_pool import DuplicationPool
+from analysis.git_history import GitHistory
+from analysis.history_cache import HistoryCache
+from analysis.lizard_cache import LizardCache
+from analysis.lizard_pool import LizardPool
+from analysis.ownership_estimator import OwnershipEstimator
+from analysis.simhash_index import SimhashIndex
+from analysis.snapshot_analyzer import SnapshotAnalyzer
+from analysis.snapshot_selector import SnapshotSelector
+from analysis.source_line_cache import SourceLineCache
 from dashboard import Dashboard
 from entities.author import Author
+from entities.author_index import AuthorIndex
 from entities.bus_factor_data import BusFactorData, FileOwner
+from entities.clone_data import CloneData
+from entities.commit_record import CommitRecord
 from entities.complexity_trend import ComplexityTrendData
-from entities.count_per_extension import CountPerExtension
 from entities.data import Data
 from entities.data_overview import OverviewData
 from entities.duplication_data import DuplicationData
 from entities.lizard_data import LizardData, LizardLocation
 from entities.period_filter import PeriodFilter
+from entities.preferences import OwnershipMode, TrendSampling
 from entities.report_config import ReportConfig
 from entities.stats.author_stats import AuthorStats
 from entities.stats.branch_stats import BranchStats
@@ -25,6 +45,8 @@ from logger import Logger
 from plot import Plot
 from preference_reader import PreferenceReader
 
+CacheT = TypeVar("CacheT", HistoryCache, BlameCache, LizardCache)
+
 
 class RepoManagement:
     def __init__(self, repo_path: str, gui, period: PeriodFilter, report_config: ReportConfig):
@@ -38,6 +60,50 @@ class RepoManagement:
         self.report_config = report_config
         self.repo_name = self.__get_repo_name_from_path(repo_path)
         self.configs = PreferenceReader.read_preferences_from_yaml()
+        self._history_cache = self.__open_cache(HistoryCache)
+        self._history = GitHistory(self._repo_obj, self._history_cache)
+        self._source_lines = SourceLineCache()
+        # opened by the first step reading source files, closed when the analysis ends
+        self._lizard_cache: LizardCache | None = None
+        self._snapshot_analyzer: SnapshotAnalyzer | None = None
+
+    def __get_snapshot_analyzer(self) -> SnapshotAnalyzer:
+        if self._snapshot_analyzer is None:
+            # only the complexity and trend steps parse files, the token clones only list them
+            if self.report_config.code_complexity:
+                self._lizard_cache = self.__open_cache(LizardCache)
+            self._snapshot_analyzer = SnapshotAnalyzer(
+                self._repo_obj,
+                self._history,
+                self._lizard_cache,
+                self.configs.CodeComplexity.ExcludeExtensions,
+                self.configs.CodeComplexity.ExcludePaths,
+            )
+        return self._snapshot_analyzer
+
+    def __close_resources(self) -> None:
+        # also on failure: stops git cat-file and keeps the lizard results parsed so far
+        if self._snapshot_analyzer is not None:
+            self._snapshot_analyzer.close()
+        if self._history_cache is not None:
+            self._history_cache.close()
+        if self._lizard_cache is not None:
+            Logger.write_log(
+                f"Lizard cache: {self._lizard_cache.hits} files reused, {self._lizard_cache.parsed} parsed",
+                log_box=self.gui,
+            )
+            self._lizard_cache.close()
+
+    def __open_cache(self, cache_type: type[CacheT]) -> CacheT | None:
+        try:
+            return cache_type(self.repo_path)
+        except Exception as e:
+            Logger.write_log(
+                f"{cache_type.__name__} not available, everything will be recomputed: {e}",
+                log_box=self.gui,
+                log_type=Logger.LogType.WARN,
+            )
+            return None
 
     def __get_repo_name_from_path(self, repo_path) -> str:
         pos = 0
@@ -49,13 +115,16 @@ class RepoManagement:
         return repo_path[len(repo_path) - pos :]
 
     def obtain_all_info_from_repo(self) -> None:
+        try:
+            self.__obtain_all_info()
+        finally:
+            self.__close_resources()
+
+    def __obtain_all_info(self) -> None:
         code_complexity = None
-        author_stats = None
-        file_stats = None
-        commits_stats = None
         branches_stats = None
         complexity_trend = None
-        authors = self.__get_authors()  # to obtain only the unique author without duplications
+        author_index = self.__get_authors()  # to obtain only the unique author without duplications
 
         steps = self.report_config.get_total_requested_steps()
         step = 1
@@ -64,7 +133,7 @@ class RepoManagement:
             Logger.update_current_step(f"{step}/{steps}: Calculating code complexity", self.gui, step, steps)
             step += 1
         code_complexity = (
-            self.__analyze_code_complexity_with_lizard(None)
+            self.__analyze_code_complexity_with_lizard()
             if self.report_config.code_complexity
             else []
         )
@@ -86,36 +155,28 @@ class RepoManagement:
             if self.report_config.code_duplication
             else []
         )
+        code_clones = self.__find_duplicated_blocks() if self.report_config.code_duplication else []
+        self._source_lines.clear()
 
         if self.report_config.bus_factor:
             Logger.update_current_step(f"{step}/{steps}: Calculating code ownership", self.gui, step, steps)
             step += 1
-        bus_factor = self.__get_bus_factor_data(authors) if self.report_config.bus_factor else None
-
-        if self.report_config.authors:
-            Logger.update_current_step(f"{step}/{steps}: Calculating author stats", self.gui, step, steps)
-            step += 1
-        author_stats = (
-            self.__get_authors_stats_list(authors) if self.report_config.authors else None
-        )
+        bus_factor = self.__get_bus_factor_data(author_index) if self.report_config.bus_factor else None
 
-        if self.report_config.files:
-            Logger.update_current_step(f"{step}/{steps}: Calculating file stats", self.gui, step, steps)
-            step += 1
-        file_stats = self.__get_files_stats_list(authors) if self.report_config.files else None
-
-        if self.report_config.commits:
-            Logger.update_current_step(f"{step}/{steps}: Calculating commits stats", self.gui, step, steps)
-            step += 1
-        commits_stats = (
-            self.__get_commits_stats_list(authors) if self.report_config.commits else None
-        )
+        # authors, files and commits share one history traversal
+        history_steps = self.report_config.authors + self.report_config.files + self.report_config.commits
+        if history_steps:
+            Logger.update_current_step(
+                f"{step}/{steps}: Calculating author, file and commit stats", self.gui, step, steps
+            )
+            step += history_steps
+        author_stats, file_stats, commits_stats = self.__get_history_stats(author_index)
 
         if self.report_config.branches:
             Logger.update_current_step(f"{step}/{steps}: Calculating branches stats", self.gui, step, steps)
             step += 1
         branches_stats = (
-            self.__get_branches_stats_list(authors) if self.report_config.branches else None
+            self.__get_branches_stats_list(author_index) if self.report_config.branches else None
         )
 
         self.__plot_all_stats(
@@ -125,72 +186,75 @@ class RepoManagement:
             branches_stats,
             code_complexity,
             code_duplication,
+            code_clones,
             bus_factor,
             complexity_trend,
         )
 
-    def __analyze_code_complexity_with_lizard(self, repo_path: Path | None = None) -> list[LizardData]:
-        target_path = Path(repo_path) if repo_path else Path(self.repo_path)
+    def __analyze_code_complexity_with_lizard(self) -> list[LizardData]:
+        target_path = Path(self.repo_path)
 
         Logger.write_log(f"Calculating code complexity for {target_path}...", log_box=self.gui)
 
         try:
-            results = lizard.analyze([str(target_path)])
+            # tracked files only, excluded and unsupported files are dropped before being opened
+            source_files = self.__get_snapshot_analyzer().get_working_tree_files()
         except Exception as e:
             Logger.write_log(f"Error analyzing code complexity: {e}", log_box=self.gui, log_type=Logger.LogType.WARN)
             return []
 
         all_functions: list[LizardData] = []
 
-        for file_info in results:
-            for fun in file_info.function_list:
+        start_time = time.monotonic()
+        self.__parse_working_tree_files(source_files)
+
+        for filename in source_files:
+            try:
+                # files unchanged since a previous run or a trend snapshot come from the cache
+                function_list = self.__get_snapshot_analyzer().analyze_file(filename)
+            except Exception as e:
+                Logger.write_log(f"Error analyzing file {filename}: {e}", log_box=self.gui, log_type=Logger.LogType.WARN)
+                continue
+
+            for fun in function_list:
 
                 if self.__skip_function_from_analysis(
                     fun.name,
                     fun.start_line,
                     fun.end_line,
-                    self.__get_extension_from_file(file_info.filename),
+                    self.__get_extension_from_file(filename),
                 ):
                     continue
 
                 data = LizardData(
                     nloc=fun.nloc,
-                    ccn=fun.cyclomatic_complexity,
-                    token=fun.token_count,
-                    param=fun.parameter_count,
+                    ccn=fun.ccn,
+                    token=fun.token,
+                    param=fun.param,
                     length=fun.length,
-                    code=self.__get_function_code(
-                        file_info.filename,
-                        fun.start_line,
-                        fun.end_line,
-                    ),
                     location=LizardLocation(
                         function=fun.name,
                         lines=f"{fun.start_line}-{fun.end_line}",
-                        file=file_info.filename,
+                        file=filename,
                     ),
+                    code_loader=partial(self.__get_function_code, filename, fun.start_line, fun.end_line),
                 )
 
                 all_functions.append(data)
 
+        elapsed = time.monotonic() - start_time
+        Logger.write_log(
+            f"Analyzed {len(source_files)} files in {elapsed:.2f}s ({len(source_files) / max(elapsed, 1e-6):.0f} files/sec)",
+            log_box=self.gui,
+        )
         Logger.write_log(f"Code complexity calculated successfully: {len(all_functions)} functions", log_box=self.gui)
 
         return all_functions
 
     def __get_function_code(self, filename: str, start_line: int, end_line: int) -> str:
         try:
-            with open(filename, "rb") as f:
-                raw = f.read()
-
-            # try utf-8 first
-            try:
-                text = raw.decode("utf-8")
-            except UnicodeDecodeError:
-                # fallback encoding
-                text = raw.decode("latin-1", errors="ignore")
-
-            lines = text.splitlines()
-
+            # every function of a file is sliced from the same decoded lines
+            lines = self._source_lines.get_lines(filename)
             return "\n".join(lines[start_line - 1 : end_line]).strip()
 
         except Exception as e:
@@ -200,137 +264,236 @@ class RepoManagement:
     def __analyze_complexity_trend(self) -> list[ComplexityTrendData]:
         Logger.write_log("Analyzing repository complexity evolution (snapshot-based)...", log_box=self.gui,)
 
-        repo = self._repo_obj
-        trends: list[ComplexityTrendData] = []
+        trend_configs = self.configs.ComplexityTrend
+        granularity = trend_configs.Granularity.value
+        trends_per_index: dict[int, ComplexityTrendData | None] = {}
 
-        snapshots = {}
+        # ---- collect one snapshot per period ----
+        selector = SnapshotSelector(
+            trend_configs.Granularity,
+            trend_configs.MaxSnapshots,
+            trend_configs.Sampling,
+            trend_configs.ChangeThreshold,
+        )
+        buckets = selector.get_buckets(self._repo_obj.iter_commits("HEAD", first_parent=True))
 
-        # ---- collect monthly snapshots ----
-        for commit in repo.iter_commits("HEAD", first_parent=True):
-            date = commit.committed_datetime.replace(tzinfo=None)
-            period = date.strftime("%Y-%m")
+        Logger.write_log(f"Found {len(buckets)} {granularity} snapshots", log_box=self.gui,)
 
-            if period not in snapshots:
-                snapshots[period] = commit
+        # ---- temporal sampling ----
+        snapshot_items = selector.get_candidates(buckets)
 
-        Logger.write_log(f"Found {len(snapshots)} monthly snapshots", log_box=self.gui,)
+        if trend_configs.Sampling == TrendSampling.ADAPTIVE:
+            Logger.write_log(
+                f"Adaptive sampling applied: up to {trend_configs.MaxSnapshots or len(buckets)} of {len(buckets)} "
+                f"{granularity} snapshots, refining changes above {trend_configs.ChangeThreshold:.0%}",
+                log_box=self.gui,
+            )
+        else:
+            Logger.write_log(
+                f"Temporal sampling applied: {len(snapshot_items)} of {len(buckets)} {granularity} snapshots selected",
+                log_box=self.gui,
+            )
 
-        # ---- temporal sampling ----
-        snapshot_items = sorted(snapshots.items())
+            if snapshot_items:
+                Logger.write_log(f"Estimated analysis time reduced by ~{len(buckets) / len(snapshot_items):.0f}x", log_box=self.gui)
 
-        count = len(snapshot_items)
+        # ---- analyze snapshots safely, coarse to fine so a time budget still covers the whole history ----
+        start_time = time.monotonic()
+        for level in selector.iter_levels(len(snapshot_items), trends_per_index):
+            if trend_configs.TimeBudgetSeconds > 0 and time.monotonic() - start_time > trend_configs.TimeBudgetSeconds:
+                Logger.write_log(
+                    f"Time budget of {trend_configs.TimeBudgetSeconds}s reached: "
+                    f"{len(trends_per_index)} snapshots analyzed",
+                    log_box=self.gui,
+                    log_type=Logger.LogType.WARN,
+                )
+                break
 
-        if count > 240:
-            step = 6
-        elif count > 120:
-            step = 3
-        elif count > 36:
-            step = 2
-        else:
-            step = 1
+            level_items = [snapshot_items[i] for i in level]
 
-        snapshot_items = snapshot_items[::step]
+            # parse every new file content of the level at once, across processes
+            self.__parse_snapshot_sources(level_items)
+
+            for i, (period, commit) in zip(level, level_items, strict=True):
+                trends_per_index[i] = self.__analyze_snapshot(period, commit)
+
+        trends = [trend for trend in trends_per_index.values() if trend is not None]
+        ComplexityTrendData.sort_by_date(trends)
 
         Logger.write_log(
-            f"Temporal sampling applied: every {step} month(s) "
-            f"({len(snapshot_items)} snapshots selected)",
+            f"Complexity trend built from {len(trends)} repository snapshots",
             log_box=self.gui,
         )
 
-        Logger.write_log(f"Estimated analysis time reduced by ~{step}x", log_box=self.gui)
+        return trends
 
-        # ---- analyze snapshots safely ----
-        for period, commit in snapshot_items:
+    def __analyze_snapshot(self, period: str, commit) -> ComplexityTrendData | None:
+        Logger.write_log(f"Analyzing snapshot {period} ({commit.hexsha[:8]})", log_box=self.gui)
 
-            Logger.write_log(f"Analyzing snapshot {period} ({commit.hexsha[:8]})", log_box=self.gui)
+        # blobs are read from the object database, nothing is checked out, unchanged files come from the cache
+        try:
+            snapshot_complexity = [
+                function
+                for rel_path, function in self.__get_snapshot_analyzer().analyze(commit.hexsha)
+                if not self.__skip_function_from_analysis(
+                    function.name,
+                    function.start_line,
+                    function.end_line,
+                    self.__get_extension_from_file(rel_path),
+                )
+            ]
+
+            if not snapshot_complexity:
+                return None
+
+            total_ccn = sum(f.ccn for f in snapshot_complexity)
+            total_nloc = sum(f.nloc for f in snapshot_complexity)
+            total_token = sum(f.token for f in snapshot_complexity)
+            total_param = sum(f.param for f in snapshot_complexity)
+
+            function_count = len(snapshot_complexity)
+
+            return ComplexityTrendData(
+                period=period,
+                date=commit.committed_datetime.replace(tzinfo=None),
+                avg_ccn=total_ccn / function_count,
+                avg_nloc=total_nloc / function_count,
+                avg_token=total_token / function_count,
+                avg_param=total_param / function_count,
+                function_count=function_count,
+                total_ccn=total_ccn,
+                total_nloc=total_nloc,
+            )
 
-            temp_dir = tempfile.mkdtemp(prefix="complexity_snapshot_")
+        except Exception as e:
+            Logger.write_log(
+                f"Snapshot analysis failed for {commit.hexsha[:8]}: {e}",
+                log_box=self.gui,
+                log_type=Logger.LogType.WARN,
+            )
+            return None
 
+    def __parse_snapshot_sources(self, snapshot_items: list) -> None:
+        sources: list[tuple[str, str]] = []
+        for _, commit in snapshot_items:
             try:
-                repo.git.config("core.protectNTFS", "false")
-                repo.git.config("core.longpaths", "true")
-                repo.git.worktree("add", "--detach", temp_dir, commit.hexsha)
+                sources += self.__get_snapshot_analyzer().get_source_files(commit.hexsha)
+            except Exception:
+                continue  # reported when the snapshot itself is analyzed
 
-                snapshot_complexity = self.__analyze_code_complexity_with_lizard(repo_path=Path(temp_dir))
+        self.__parse_in_pool(sources, self.configs.ComplexityTrend.Workers, f"of {len(snapshot_items)} snapshots")
 
-                if not snapshot_complexity:
-                    continue
-
-                total_ccn = sum(f.ccn for f in snapshot_complexity)
-                total_nloc = sum(f.nloc for f in snapshot_complexity)
-                total_token = sum(f.token for f in snapshot_complexity)
-                total_param = sum(f.param for f in snapshot_complexity)
-
-                function_count = len(snapshot_complexity)
-
-                trends.append(
-                    ComplexityTrendData(
-                        period=period,
-                        date=commit.committed_datetime.replace(tzinfo=None),
-                        avg_ccn=total_ccn / function_count,
-                        avg_nloc=total_nloc / function_count,
-                        avg_token=total_token / function_count,
-                        avg_param=total_param / function_count,
-                        function_count=function_count,
-                        total_ccn=total_ccn,
-                        total_nloc=total_nloc,
-                    )
-                )
-
-            except Exception as e:
-                Logger.write_log(
-                    f"Snapshot analysis failed for {commit.hexsha[:8]}: {e}",
-                    log_box=self.gui,
-                    log_type=Logger.LogType.WARN,
-                )
-
-            finally:
-                try:
-                    repo.git.worktree("remove", "--force", temp_dir)
-                except Exception:
-                    pass
+    def __parse_working_tree_files(self, source_files: list[str]) -> None:
+        sources: list[tuple[str, str]] = []
+        for filename in source_files:
+            try:
+                sources.append((filename, self.__get_snapshot_analyzer().get_file_blob(filename)))
+            except Exception:
+                continue  # reported when the file itself is analyzed
 
-                shutil.rmtree(temp_dir, ignore_errors=True)
+        self.__parse_in_pool(sources, self.configs.CodeComplexity.Workers, "of the working tree", from_disk=True)
 
-        ComplexityTrendData.sort_by_date(trends)
+    def __parse_in_pool(self, sources: list[tuple[str, str]], workers: int, description: str, from_disk: bool = False) -> None:
+        # only fills the lizard cache, whatever is left out is parsed one by one afterwards
+        lizard_pool = LizardPool(self.repo_path, workers)
+        if lizard_pool.workers <= 1:
+            return
+        unparsed = self.__get_snapshot_analyzer().get_unparsed(sources)
+        if len(unparsed) < LizardPool.MIN_SOURCES:
+            return
 
         Logger.write_log(
-            f"Complexity trend built from {len(trends)} repository snapshots",
+            f"Parsing {len(unparsed)} files {description} with {lizard_pool.workers} processes",
             log_box=self.gui,
         )
-
-        return trends
-
+        try:
+            for rel_path, blob, functions in lizard_pool.run(unparsed, from_disk=from_disk):
+                if functions is not None:
+                    self.__get_snapshot_analyzer().add_parsed(rel_path, blob, functions)
+        except Exception as e:
+            Logger.write_log(
+                f"Parallel parsing failed, files will be parsed one by one: {e}",
+                log_box=self.gui,
+                log_type=Logger.LogType.WARN,
+            )
 
     def __find_possible_duplicates(self, stats: list[LizardData]) -> list[DuplicationData]:
         Logger.write_log("Analyzing code duplication (prehashed)...", log_box=self.gui)
         duplicates: list[DuplicationData] = []
 
-        stats.sort(key=lambda s: s.hash_value)
-
-        window_size = self.configs.CodeDuplication.WindowSize  # checks only neighbours
-        max_hamming_diff = self.configs.CodeDuplication.MaxHammingDiff
-        max_nloc_diff = self.configs.CodeDuplication.MaxNlocDiff
         threshold = self.configs.CodeDuplication.Threshold
-        for i, ld1 in enumerate(stats):
-            for j in range(i + 1, min(i + window_size, len(stats))):
-                ld2 = stats[j]
+        index = SimhashIndex([s.hash_value for s in stats], self.configs.CodeDuplication.MaxHammingDiff)
+        left, right = index.find_pairs()
 
-                # check fast hamming difference
-                hamming_dist = bin(ld1.hash_value ^ ld2.hash_value).count("1")
-                if hamming_dist > max_hamming_diff:
-                    continue
+        # only pairs of similar size, whose metrics alone do not already exceed the threshold, reach the text comparison
+        diff_nloc, numeric_score = RepoManagement.__get_numeric_scores(stats, left, right)
+        close = (diff_nloc < self.configs.CodeDuplication.MaxNlocDiff) & (0.6 * numeric_score <= threshold)
+        left, right = left[close], right[close]
 
-                if abs(ld1.nloc - ld2.nloc) >= max_nloc_diff:
-                    continue
-
-                score = ld1.similarity_score(ld2)
-                if score <= threshold:
-                    duplicates.append(DuplicationData(ld1, ld2, score))
+        scores = self.__score_pairs_in_pool(stats, left, right, threshold)
+        for k, (i, j) in enumerate(zip(left.tolist(), right.tolist(), strict=True)):
+            ld1, ld2 = stats[i], stats[j]
+            score = scores[k] if scores is not None else ld1.similarity_score(ld2, threshold)
+            if score <= threshold:
+                duplicates.append(DuplicationData(ld1, ld2, score))
 
         Logger.write_log(f"Found {len(duplicates)} duplications", log_box=self.gui)
         return duplicates
 
+    @staticmethod
+    def __get_numeric_scores(stats: list[LizardData], left: np.ndarray, right: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # (nloc difference, numeric score) of every pair, the same weights and order as LizardData.similarity_score
+        metrics = np.array([(s.nloc, s.token, s.ccn, s.param, s.length) for s in stats], dtype=np.float64).reshape(-1, 5)
+        diff = np.abs(metrics[left] - metrics[right])
+        numeric_score = 0.3 * diff[:, 0] + 0.3 * diff[:, 1] + 0.2 * diff[:, 2] + 0.1 * diff[:, 3] + 0.1 * diff[:, 4]
+        return diff[:, 0], numeric_score
+
+    def __score_pairs_in_pool(
+        self, stats: list[LizardData], left: np.ndarray, right: np.ndarray, threshold: float
+    ) -> list[float] | None:
+        # None means the pairs are scored one by one in this process
+        duplication_pool = DuplicationPool(self.configs.CodeDuplication.Workers)
+        if duplication_pool.workers <= 1 or len(left) < DuplicationPool.MIN_PAIRS:
+            return None
+
+        Logger.write_log(
+            f"Scoring {len(left)} candidate pairs with {duplication_pool.workers} processes",
+            log_box=self.gui,
+        )
+        try:
+            return duplication_pool.run(stats, left, right, threshold)
+        except Exception as e:
+            Logger.write_log(
+                f"Parallel scoring failed, pairs will be scored one by one: {e}",
+                log_box=self.gui,
+                log_type=Logger.LogType.WARN,
+            )
+            return None
+
+    def __find_duplicated_blocks(self) -> list[CloneData]:
+        Logger.write_log("Analyzing duplicated code blocks (token based)...", log_box=self.gui)
+        start_time = time.monotonic()
+        try:
+            # copies of a whole file are duplicated blocks too, so files with the same content are kept
+            source_files = self.__get_snapshot_analyzer().get_working_tree_files(distinct_blobs=False)
+        except Exception as e:
+            Logger.write_log(f"Error analyzing duplicated code blocks: {e}", log_box=self.gui, log_type=Logger.LogType.WARN)
+            return []
+
+        detector = CloneDetector(self.configs.CodeDuplication.MinCloneTokens)
+        for filename in source_files:
+            try:
+                detector.add_file(filename, SnapshotAnalyzer.decode_source(SnapshotAnalyzer.read_file(filename)))
+            except Exception as e:
+                Logger.write_log(f"Error tokenizing file {filename}: {e}", log_box=self.gui, log_type=Logger.LogType.WARN)
+
+        clones = detector.find_clones()
+        Logger.write_log(
+            f"Found {len(clones)} duplicated code blocks in {len(source_files)} files ({time.monotonic() - start_time:.2f}s)",
+            log_box=self.gui,
+        )
+        return clones
+
     def __skip_function_from_analysis(
         self, function_name: str, start_line: int, end_line: int, file_extension: str
     ) -> bool:
@@ -340,13 +503,14 @@ class RepoManagement:
             or start_line == end_line
         )
 
-    def __get_bus_factor_data(self, authors: list[Author]) -> list[BusFactorData]:
+    def __get_bus_factor_data(self, author_index: AuthorIndex) -> list[BusFactorData]:
         Logger.write_log("Calculating code ownership by file stats...", log_box=self.gui)
         file_counts_map: list[BusFactorData] = []
 
         # All file in the current branch
         try:
-            tracked_files = self._repo_obj.git.ls_tree("-r", "--name-only", "HEAD").splitlines()
+            tracked_files = self._history.get_tree_blobs("HEAD")
+            head_sha = self._repo_obj.head.commit.hexsha
         except Exception as e:
             Logger.write_log(
                 f"Error getting tracked files from HEAD: {e}",
@@ -355,14 +519,22 @@ class RepoManagement:
             )
             return []
 
-        for rel_path in tracked_files:
-            if rel_path.endswith(tuple(self.configs.CodeOwnership.ExcludeExtensions)):
-                continue
+        tracked_files = [
+            (rel_path, blob)
+            for rel_path, blob in tracked_files
+            if not rel_path.endswith(tuple(self.configs.CodeOwnership.ExcludeExtensions))
+        ]
 
+        if self.configs.CodeOwnership.Mode == OwnershipMode.FAST:
+            ownership = self.__iter_estimated_ownership(tracked_files, head_sha, author_index)
+        else:
+            ownership = self.__iter_blame_ownership(tracked_files, head_sha)
+
+        for rel_path, authors_count, error in ownership:
             try:
                 abs_path = os.path.join(self._repo_obj.working_tree_dir, rel_path)
                 bus_factor = BusFactorData(abs_path)
-                self.__map_blame_file_into_bus_factor(bus_factor, authors)
+                self.__map_blame_file_into_bus_factor(bus_factor, rel_path, authors_count, error, author_index)
                 file_counts_map.append(bus_factor)
 
             except Exception as e:
@@ -375,41 +547,92 @@ class RepoManagement:
         Logger.write_log("Code ownership successfully calculated", log_box=self.gui)
         return file_counts_map
 
+    def __iter_blame_ownership(
+        self, tracked_files: list[tuple[str, str]], head_sha: str
+    ) -> Iterator[tuple[str, dict[str, int] | None, Exception | None]]:
+        # files with the same blob, untouched since the cached HEAD, keep their previous blame
+        blame_cache = self.__open_cache(BlameCache)
+        cached = blame_cache.load(head_sha, self._history) if blame_cache else {}
+        to_blame = [rel_path for rel_path, blob in tracked_files if rel_path not in cached or cached[rel_path][0] != blob]
+
+        reused = len(tracked_files) - len(to_blame)
+        hit_rate = reused / len(tracked_files) * 100 if tracked_files else 0
+        Logger.write_log(f"Blame cache: {reused}/{len(tracked_files)} files reused ({hit_rate:.1f}% hit rate)", log_box=self.gui)
+
+        blame_runner = BlameRunner(self._repo_obj, self.configs.CodeOwnership.Workers, rev=head_sha)
+        Logger.write_log(f"Running git blame on {len(to_blame)} files with {blame_runner.workers} workers", log_box=self.gui)
+
+        # results come back in file order, so logs and report do not depend on the scheduling
+        blamed = blame_runner.run(to_blame)
+        to_blame_set = set(to_blame)
+        entries: dict[str, tuple[str, dict[str, int]]] = {}
+        for rel_path, blob in tracked_files:
+            if rel_path in to_blame_set:
+                _, authors_count, error = next(blamed)
+            else:
+                authors_count, error = cached[rel_path][1], None
+
+            if authors_count is not None and error is None:
+                entries[rel_path] = (blob, authors_count)
+            yield rel_path, authors_count, error
+
+        if blame_cache is not None:
+            blame_cache.save(head_sha, entries)
+            blame_cache.close()
+
+    def __iter_estimated_ownership(
+        self, tracked_files: list[tuple[str, str]], head_sha: str, author_index: AuthorIndex
+    ) -> Iterator[tuple[str, dict[str, int] | None, Exception | None]]:
+        Logger.write_log(f"Estimating ownership of {len(tracked_files)} files from the commit history", log_box=self.gui)
+
+        estimator = OwnershipEstimator(
+            (rel_path for rel_path, _ in tracked_files),
+            lambda email: self.__find_author(email, author_index),
+        )
+        try:
+            # oldest first, merges skipped since the commits they bring in are walked on their own
+            lines_per_file = estimator.estimate(self._history.iter_commits("--reverse", "--no-merges", head_sha))
+        except Exception as e:
+            Logger.write_log(
+                f"Error estimating code ownership from the history: {e}",
+                log_box=self.gui,
+                log_type=Logger.LogType.WARN,
+            )
+            return
+
+        for rel_path, _ in tracked_files:
+            yield rel_path, lines_per_file[rel_path], None
+
     def __map_blame_file_into_bus_factor(
-        self, bus_factor: BusFactorData, authors: list[Author]
+        self,
+        bus_factor: BusFactorData,
+        rel_path: str,
+        blame_count: dict[str, int] | None,
+        blame_error: Exception | None,
+        author_index: AuthorIndex,
     ) -> None:
-        from collections import defaultdict
-
         authors_count = defaultdict(int)
 
         # if there are not many authors we shows also the authors with 0% as total
-        if len(authors) <= self.configs.CodeOwnership.ShowZeroPercentAuthorsIfLessThan:
-            for author in authors:
+        if len(author_index.authors) <= self.configs.CodeOwnership.ShowZeroPercentAuthorsIfLessThan:
+            for author in author_index.authors:
                 authors_count[author.main_username] = 0
 
-        rel_path = os.path.relpath(bus_factor.filepath, self._repo_obj.working_tree_dir).replace(
-            "\\", "/"
-        )
-
         Logger.write_log(f"calculating ownership for file: {rel_path}", log_box=self.gui)
 
-        try:
-            result = self._repo_obj.git.blame("--line-porcelain", rel_path)
-        except Exception as e:
+        if blame_error is not None or blame_count is None:
             Logger.write_log(
-                f"Git blame exited with error on file {rel_path}: {e}",
+                f"Git blame exited with error on file {rel_path}: {blame_error}",
                 log_box=self.gui,
                 log_type=Logger.LogType.WARN,
             )
             return
 
-        for line in result.splitlines():
-            if line.startswith("author "):
-                author_name = line[len("author ") :].strip()
-                authors_count[author_name] += 1
+        for author_name, lines in blame_count.items():
+            authors_count[author_name] += lines
 
         for author_name, lines in authors_count.items():
-            author_obj = Author.get_author_by_username(authors, author_name)
+            author_obj = author_index.find_by_username(author_name)
 
             if author_obj is None:
                 Logger.write_log(
@@ -421,45 +644,18 @@ class RepoManagement:
 
             bus_factor.add_owner(FileOwner(author=author_obj, lines=lines))
 
-    def __iter_filtered_commits(self, **kwargs):
-        for commit in self._repo_obj.iter_commits(**kwargs):
-            commit_date = commit.committed_datetime.replace(tzinfo=None)
-            if self.period.start_date and commit_date < self.period.start_date:
-                continue
-            if self.period.end_date and commit_date > self.period.end_date:
-                continue
-            yield commit
+    def __iter_filtered_commits(self, *rev_args: str) -> Iterator[CommitRecord]:
+        # git only walks the commits around the period, the exact boundaries are checked here
+        period_args = GitHistory.get_period_args(self.period)
+        for commit in self._history.iter_commits(*period_args, *rev_args):
+            if self.period.contains(commit.committed_datetime):
+                yield commit
 
-    def __get_authors(self) -> list[Author]:
+    def __get_authors(self) -> AuthorIndex:
         Logger.write_log("Getting authors...", log_box=self.gui)
 
-        authors: list[Author] = []
-        noreply_authors: list[Author] = []
+        author_index = AuthorIndex()
 
-        # from commits
-        for commit in self._repo_obj.iter_commits():  # No filters!
-            if not commit.author.email or not commit.author.name:
-                continue
-            email = commit.author.email.lower()
-            name = commit.author.name.strip()
-            new_author = Author(email, name)
-
-            if "noreply.github.com" in email:
-                noreply_authors.append(new_author)
-                continue
-
-            pos = new_author.get_pos_inside(authors)
-            if pos != -1:
-                authors[pos].add_email_if_not_saved(email)
-                authors[pos].add_username_alias_if_not_saved(name)
-            else:
-                authors.append(new_author)
-                Logger.write_log(
-                    f"User (from commit): {new_author.main_username} ({new_author.main_email})",
-                    log_box=self.gui,
-                )
-
-        # from branches
         try:
             self._repo_obj.remotes.origin.fetch()
         except Exception as e:
@@ -469,207 +665,101 @@ class RepoManagement:
                 log_type=Logger.LogType.WARN,
             )
 
-        for ref in self._repo_obj.refs:
-            if ref.name.startswith("origin/") or ref in self._repo_obj.branches:
-                commit = ref.commit
-                if commit and commit.author.email and commit.author.name:
-                    email = commit.author.email.lower()
-                    name = commit.author.name.strip()
-                    new_author = Author(email, name)
-
-                    if "noreply.github.com" in email:
-                        noreply_authors.append(new_author)
-                        continue
-
-                    pos = new_author.get_pos_inside(authors)
-                    if pos != -1:
-                        authors[pos].add_email_if_not_saved(email)
-                        authors[pos].add_username_alias_if_not_saved(name)
-                    else:
-                        authors.append(new_author)
-                        Logger.write_log(
-                            f"User (from branch): {new_author.main_username} ({new_author.main_email})",
-                            log_box=self.gui,
-                        )
-
-        # sanification github noreply
-        for noreply in noreply_authors:
-            main_found = False
-            for author in authors:
-                if (
-                    author.main_username.lower() in noreply.main_email
-                    or author.main_username == noreply.main_username
-                ):
-                    author.add_email_if_not_saved(noreply.main_email)
-                    author.add_username_alias_if_not_saved(noreply.main_username)
-                    main_found = True
-            if not main_found:
-                authors.append(noreply)
+        # one stream over every ref but the stash, names and emails are canonicalised by git through .mailmap
+        for name, email, raw_email in self._history.iter_author_identities("--exclude=refs/stash", "--all"):
+            author_index.add_identity(email, name, alias_email=raw_email)
+
+        # identities sharing an email or a name (github noreply included) are merged into one author
+        for author in author_index.build():
+            if AuthorIndex.is_noreply(author.main_email):
                 Logger.write_log(
-                    f"Main email not found for user: {noreply.main_username} ({noreply.main_email})",
+                    f"Main email not found for user: {author.main_username} ({author.main_email})",
                     log_box=self.gui,
                     log_type=Logger.LogType.WARN,
                 )
+            else:
+                Logger.write_log(f"User: {author.main_username} ({author.main_email})", log_box=self.gui)
 
-        return authors
-
-    def __get_authors_stats_list(self, authors: list[Author]) -> list[AuthorStats]:
-        Logger.write_log("Getting authors stats list...", log_box=self.gui)
-
-        author_stats_map = {
-            author.main_username: AuthorStats(
-                author,
-                0,
-                CountPerExtension(),
-                CountPerExtension(),
-                CountPerExtension(),
-                CountPerExtension(),
-            )
-            for author in authors
-        }
-
-        for commit in self.__iter_filtered_commits():
-            if not commit.author.email:
-                continue
-            author = self.__find_author(commit.author.email, authors)
-            if not author:
-                continue
-
-            a_stats = author_stats_map[author.main_username]
-            a_stats.commits += 1
-
-            for file, file_stats in commit.stats.files.items():
-                ext = self.__get_extension_from_file(str(file))
-                ext = ext.lower().strip()
-
-                if self.__skip_author_stat_from_analysis(ext) or ext == "":
-                    continue
-
-                a_stats.insertions.total += file_stats.get("insertions", 0)
-                a_stats.insertions.per_extension[ext] += file_stats.get("insertions", 0)
-
-                a_stats.deletions.total += file_stats.get("deletions", 0)
-                a_stats.deletions.per_extension[ext] += file_stats.get("deletions", 0)
-
-                lines = file_stats.get("lines", 0)
-                a_stats.lines.total += lines
-                a_stats.lines.per_extension[ext] += lines
-
-                a_stats.files.total += 1
-                a_stats.files.per_extension[ext] += 1
+        return author_index
 
-        Logger.write_log(
-            f"Author stats list obtained ({len(author_stats_map)})", log_box=self.gui
+    def __get_history_stats(
+        self, author_index: AuthorIndex
+    ) -> tuple[list[AuthorStats] | None, list[FileStats] | None, list[CommitStats] | None]:
+        author_collector = (
+            AuthorStatsCollector(author_index.authors, self.configs.AuthorStat.ExcludeExtensions) if self.report_config.authors else None
         )
+        file_collector = FileStatsCollector() if self.report_config.files else None
+        commit_collector = CommitStatsCollector() if self.report_config.commits else None
 
-        # removing all users with no data from list
-        authors_ok: list[AuthorStats] = []
-        for author in list(author_stats_map.values()):
-            if author.has_stats():
-                authors_ok.append(author)
-
-        return authors_ok
+        collectors = [c for c in (author_collector, file_collector, commit_collector) if c is not None]
+        if not collectors:
+            return None, None, None
 
-    def __skip_author_stat_from_analysis(self, file_extension: str) -> bool:
-        return file_extension in self.configs.AuthorStat.ExcludeExtensions
+        Logger.write_log("Walking commit history...", log_box=self.gui)
+        pipeline = CommitPipeline(collectors, lambda email: self.__find_author(email, author_index))
+        walked = pipeline.run(self.__iter_filtered_commits())
 
-    def __get_files_stats_list(self, authors: list[Author]) -> list[FileStats]:
-        Logger.write_log("Getting files stats list...", log_box=self.gui)
+        Logger.write_log(f"Commit history walked once for {len(collectors)} collector(s): {walked} commits", log_box=self.gui)
+        if self._history_cache is not None:
+            Logger.write_log(f"History cache: {self._history.last_cache_misses} new commit(s) diffed", log_box=self.gui)
 
-        file_stats_map: dict[str, FileStats] = {}
+        author_stats = author_collector.get_result() if author_collector else None
+        file_stats = file_collector.get_result() if file_collector else None
+        commits_stats = commit_collector.get_result() if commit_collector else None
 
-        for commit in self.__iter_filtered_commits():
-            if not commit.author.email:
-                continue
-            author = self.__find_author(commit.author.email, authors)
-            if not author:
-                continue
+        if author_stats is not None:
+            Logger.write_log(f"Author stats list obtained ({len(author_stats)})", log_box=self.gui)
 
-            for file_name in commit.stats.files:
-                if file_name not in file_stats_map:
-                    file_extension = self.__get_extension_from_file(str(file_name)) or "Other"
-                    file_stats_map[str(file_name)] = FileStats(str(file_name), 0, None, None, file_extension)
-
-                f_stats = file_stats_map[str(file_name)]
-                f_stats.changes += 1
-                commit_datetime = commit.committed_datetime.replace(tzinfo=None)
-                if f_stats.last_update is None or commit_datetime > f_stats.last_update:
-                    f_stats.last_update = commit_datetime
-                    f_stats.last_author = author
-        files_stats = [stat for stat in file_stats_map.values() if stat.changes > 0]
-        return files_stats
-
-    def __get_commits_stats_list(self, authors: list[Author]) -> list[CommitStats]:
-        Logger.write_log("Getting commits stats list...", log_box=self.gui)
-
-        commits_stats = []
-        for commit in self.__iter_filtered_commits():
-            Logger.write_log(f"Getting commit stats for {commit.hexsha}", log_box=self.gui)
-            if not commit.author.email:
-                continue
-            author = self.__find_author(commit.author.email, authors)
-            commits_stats.append(
-                CommitStats(
-                    str(commit), author, len(commit.stats.files.keys()), commit.committed_datetime
-                )
-            )
+        return author_stats, file_stats, commits_stats
 
-        return commits_stats
-
-    def __get_branches_stats_list(self, authors: list[Author]) -> list[BranchStats]:
+    def __get_branches_stats_list(self, author_index: AuthorIndex) -> list[BranchStats]:
         Logger.write_log("Getting all branches (local + remote)...", log_box=self.gui)
 
-        branches = list(self._repo_obj.branches) + list(self._repo_obj.remotes.origin.refs)
-        branches_stats = []
+        # tip sha, date and author of every branch from a single for-each-ref
+        refs = list(self._history.iter_refs("refs/heads", "refs/remotes/origin"))
 
-        for branch in branches:
-            Logger.write_log(f"Getting branch stats for {branch.name}", log_box=self.gui)
+        default_branch = self._history.get_default_branch()
+        base_tip = next((ref.sha for ref in refs if ref.name == default_branch), None)
 
-            try:
-                commit = branch.commit
-            except Exception as e:
-                Logger.write_log(
-                    f"Cannot access commit for {branch.name}: {e}",
-                    log_box=self.gui,
-                    log_type=Logger.LogType.WARN,
-                )
-                continue
-
-            try:
-                commit_count = int(self._repo_obj.git.rev_list("--count", branch.name))
-            except Exception as e:
-                Logger.write_log(
-                    f"Cannot count commits for {branch.name}: {e}",
-                    log_box=self.gui,
-                    log_type=Logger.LogType.WARN,
-                )
-                commit_count = 0
-
-            if not commit or not commit.committed_datetime:
-                continue
-
-            author_obj = self.__find_author(commit.author.email if commit.author.email else "", authors)
+        try:
+            # commit counts of every branch come out of one walk of the graph
+            counts = self._history.count_commits_per_tip([ref.sha for ref in refs], base_tip)
+        except Exception as e:
+            Logger.write_log(
+                f"Cannot count commits for branches: {e}",
+                log_box=self.gui,
+                log_type=Logger.LogType.WARN,
+            )
+            counts = {}
 
+        branches_stats = []
+        for ref in refs:
+            ref_counts = counts.get(ref.sha)
             branches_stats.append(
                 BranchStats(
-                    branch.name,
-                    author_obj,
-                    commit_count,
-                    commit.committed_datetime,
+                    ref.name,
+                    self.__find_author(ref.author_email, author_index),
+                    ref_counts.commits if ref_counts else 0,
+                    ref.committed_datetime,
+                    ref_counts.ahead if ref_counts else None,
+                    ref_counts.behind if ref_counts else None,
                 )
             )
 
+        Logger.write_log(
+            f"Branch stats obtained for {len(branches_stats)} branches (default branch: {default_branch or 'N/A'})",
+            log_box=self.gui,
+        )
         return branches_stats
 
     def __get_extension_from_file(self, file_path: str) -> str:
         _, ext = os.path.splitext(file_path)
         return ext.lstrip(".").lower()
 
-    def __find_author(self, email: str, authors: list[Author]) -> Author:
-        email = email.lower()
-        for author in authors:
-            if email in author.emails:
-                return author
+    def __find_author(self, email: str, author_index: AuthorIndex) -> Author:
+        author = author_index.find_by_email(email)
+        if author is not None:
+            return author
         Logger.write_log(
             f"No user with email {email} found, setting value to Unknown",
             log_box=self.gui,
@@ -685,6 +775,7 @@ class RepoManagement:
         branches_stats: list[BranchStats] | None,
         code_complexity: list[LizardData] | None,
         code_duplication: list[DuplicationData] | None,
+        code_clones: list[CloneData] | None,
         bus_factor: list[BusFactorData] | None,
         complexity_trend: list[ComplexityTrendData] | None,
     ) -> None:
@@ -738,6 +829,11 @@ class RepoManagement:
             if self.report_config.code_duplication and code_duplication
             else ["No data available"]
         )
+        csv_code_clones = (
+            CloneData.to_csv_data_list(code_clones)
+            if self.report_config.code_duplication and code_clones
+            else ["No data available"]
+        )
         csv_bus_factor_summary = (
             BusFactorData.to_csv_data_list_summary(bus_factor)
             if self.report_config.bus_factor and bus_factor
@@ -786,6 +882,7 @@ class RepoManagement:
             csv_code_complexity_summary,
             csv_code_complexity,
             csv_code_duplication,
+            csv_code_clones,
             csv_bus_factor_summary,
             csv_bus_factor,
             complexity_trend_summary_html,
@@ -0,0 +1,27 @@
+import random
+
+from analysis.clone_detector import CloneDetector
+
+
+def make_code(statements: int, seed: int) -> str:
+    rng = random.Random(seed)
+    names = [f"value_{i}" for i in range(200)]
+    return "\n".join(f"{rng.choice(names)} = {rng.choice(names)} + {i}" for i in range(statements))
+
+
+def test_identical_files_give_one_clone_with_both_full_copies():
+    block = make_code(20, seed=1)
+    # repeated inside the file too, so fingerprints of the copy pair up with its first place in another position
+    code = "\n".join([make_code(30, seed=2), block, make_code(30, seed=3), block, make_code(30, seed=4)])
+    detector = CloneDetector(50)
+    detector.add_file("original.py", code)
+    detector.add_file("vendor_copy.py", code)
+    total_tokens = len(detector._tokens[0])
+
+    clones = [clone for clone in detector.find_clones() if {location.file for location in clone.locations} != {"original.py"}]
+
+    assert len(clones) == 1
+    assert [(location.file, location.tokens) for location in clones[0].locations] == [
+        ("original.py", total_tokens),
+        ("vendor_copy.py", total_tokens),
+    ]